@@ -1,55 +1,66 @@
-from RealtimeSTT import AudioToTextRecorder
-from faster_whisper import WhisperModel
-import sounddevice as sd
-from scipy.io.wavfile import write
-import tempfile
-import os
-from faster_whisper import WhisperModel
+from scipy.signal import resample_poly
+import io
+import threading
+import numpy as np
 
+WHISPER_MODEL_SIZE = "base"
+WHISPER_SAMPLE_RATE = 16000
+
+_whisper_model = None
+_model_lock = threading.Lock()
+
+
+def get_whisper_model():
+    """Load the shared Whisper model on first use."""
+    global _whisper_model
+    if _whisper_model is None:
+        with _model_lock:
+            if _whisper_model is None:
+                from faster_whisper import WhisperModel
+
+                _whisper_model = WhisperModel(WHISPER_MODEL_SIZE, device="cpu", compute_type="int8")
+    return _whisper_model
 
-def wave2vecpath(audio_path="../data/book_slot.m4a"):
-    model_size = "base"
-    model = WhisperModel(model_size, device="cpu", compute_type="int8")
-    segments, info = model.transcribe(audio_path, beam_size=5)
 
-    text_data = []
+def iter_transcription(audio, vad_filter=True):
+    """Yield segment texts as Whisper decodes them.
+
+    `audio` can be a file path, a file-like object, raw file bytes, or a
+    16 kHz mono float32 numpy array.
+    """
+    if isinstance(audio, (bytes, bytearray)):
+        audio = io.BytesIO(audio)
+    segments, info = get_whisper_model().transcribe(audio, beam_size=5, vad_filter=vad_filter)
     for segment in segments:
-        text_data.append(segment.text)
+        yield segment.text
+
 
-    return " ".join(text_data)
+def transcribe(audio, vad_filter=True):
+    return " ".join(iter_transcription(audio, vad_filter=vad_filter))
+
+
+def wave2vecpath(audio_path="../data/book_slot.m4a"):
+    return transcribe(audio_path)
 
 
 def wave2vecrecording(duration=5, fs=16000):
+    import sounddevice as sd
+
     # Record audio from mic
     print("Recording...")
-    audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
+    audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='float32')
     sd.wait()
     print("Recording finished.")
 
-    # Save audio to temporary WAV file
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-        write(tmp_file.name, fs, audio)
-        audio_path = tmp_file.name
-
-    # Transcribe with faster-whisper
-    model_size = "base"
-    model = WhisperModel(model_size, device="cpu", compute_type="int8")
-    segments, info = model.transcribe(audio_path, beam_size=5)
-
-    # Collect text
-    text_data = []
-    for segment in segments:
-        text_data.append(segment.text)
-
-    # Cleanup temp file
-    os.remove(audio_path)
-
-    return " ".join(text_data)
+    # faster-whisper takes 16 kHz float32 samples directly, no temp WAV needed
+    audio = audio.flatten()
+    if fs != WHISPER_SAMPLE_RATE:
+        audio = resample_poly(audio, WHISPER_SAMPLE_RATE, fs).astype(np.float32)
+    return transcribe(audio)
 
 
 def main():
-    wave2vec()
+    print(wave2vecpath())
 
 if __name__=="__main__":
     main()
-
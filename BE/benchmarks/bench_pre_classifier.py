@@ -0,0 +1,113 @@
+"""Compare the local pre-classifier against the LLM classification path.
+
+Run from the BE folder with Ollama up:
+    python benchmarks/bench_pre_classifier.py
+Pass --local-only to skip the LLM calls and only time the local router.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import STRUCTURED_OUTPUT_ENABLED, get_classifier_llm, task_model, task_options
+from http_client import close_http_client
+from models import Intent_Classification, QueryClarity
+from ollama_client import generate_structured
+from tasks import classify_intent, query_clarity, classifier_prompt, INTENT_SYSTEM, CLARITY_SYSTEM
+from utils import preprocess_text
+from pre_classifier import get_pre_classifier, pre_classify
+
+# Held-out queries, none of which appear verbatim in the router's examples
+EVAL_SET = [
+    ("what are your clinic hours", "FAQ"),
+    ("do you do invisalign?", "FAQ"),
+    ("is there parking at the clinic", "FAQ"),
+    ("which insurance plans do you take", "FAQ"),
+    ("how much is a cleaning", "FAQ"),
+    ("can kids be treated at your clinic", "FAQ"),
+    ("do you whiten teeth", "FAQ"),
+    ("what's the cancellation policy", "FAQ"),
+    ("are you open on weekends", "FAQ"),
+    ("do you do root canals", "FAQ"),
+    ("is the clinic wheelchair accessible", "FAQ"),
+    ("can I pay in installments", "FAQ"),
+    ("book me a slot in Bangalore tomorrow morning", "Booking"),
+    ("I need an orthodontist appointment in Bangalore", "Booking"),
+    ("any evening slots in Chennai?", "Booking"),
+    ("find an implants clinic in Chennai", "Booking"),
+    ("schedule a visit in Pune at night", "Booking"),
+    ("I want to see a dentist this afternoon", "Booking"),
+    ("get me an appointment for a cleaning", "Booking"),
+    ("hey", "Vague"),
+    ("I have a doubt", "Vague"),
+    ("can you assist", "Vague"),
+    ("umm what", "Vague"),
+    ("question", "Vague"),
+]
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000 if samples else float("nan")
+
+
+async def run_classifier(stage, query, system, task_fn, schema):
+    if STRUCTURED_OUTPUT_ENABLED:
+        response = await generate_structured(
+            classifier_prompt(query), schema.model_json_schema(),
+            system=system, model=task_model(stage), options=task_options(stage), stage=stage
+        )
+    else:
+        response = await asyncio.to_thread(task_fn, query, get_classifier_llm())
+    return preprocess_text(response, schema)
+
+
+async def llm_classify(query):
+    # Mirrors the separate-classifier path in main.py: intent and clarity run concurrently
+    _, details = await asyncio.gather(
+        run_classifier("intent_classify", query, INTENT_SYSTEM, classify_intent, Intent_Classification),
+        run_classifier("clarity_classify", query, CLARITY_SYSTEM, query_clarity, QueryClarity),
+    )
+    return details["class_type"]
+
+
+async def run(local_only):
+    get_pre_classifier()  # exclude the one-off example encoding from the timings
+
+    routed_latencies, llm_latencies = [], []
+    bypassed, local_correct, llm_correct = 0, 0, 0
+    for query, expected in EVAL_SET:
+        start = time.perf_counter()
+        local = pre_classify(query)
+        if local is not None:
+            bypassed += 1
+            predicted = local["class_type"]
+        elif local_only:
+            predicted = None
+        else:
+            predicted = await llm_classify(query)
+        routed_latencies.append(time.perf_counter() - start)
+        local_correct += predicted == expected
+
+        if not local_only:
+            start = time.perf_counter()
+            llm_prediction = await llm_classify(query)
+            llm_latencies.append(time.perf_counter() - start)
+            llm_correct += llm_prediction == expected
+    await close_http_client()
+
+    total = len(EVAL_SET)
+    print(f"Queries:          {total}")
+    print(f"LLM bypass rate:  {bypassed / total:.1%}")
+    print(f"Routed path:      p50 {percentile(routed_latencies, 50):.1f} ms  p95 {percentile(routed_latencies, 95):.1f} ms  accuracy {local_correct / total:.1%}")
+    if not local_only:
+        print(f"LLM-only path:    p50 {percentile(llm_latencies, 50):.1f} ms  p95 {percentile(llm_latencies, 95):.1f} ms  accuracy {llm_correct / total:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--local-only", action="store_true", help="only time the local router, never call the LLM")
+    args = parser.parse_args()
+    asyncio.run(run(args.local_only))
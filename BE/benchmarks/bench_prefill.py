@@ -0,0 +1,84 @@
+"""Measure classifier prefill time with and without prompt prefix reuse.
+
+Sends the same queries to Ollama three ways and reports the prompt tokens
+it actually evaluated and the prefill time from its own timings:
+  cold    - a unique marker ahead of the instructions, so no prefix can be reused
+  inline  - the old layout, instructions and query in one user prompt
+  prefix  - static system prefix plus the query suffix, with keep_alive
+Run from the BE folder with Ollama up:
+    python benchmarks/bench_prefill.py --rounds 3
+"""
+import argparse
+import os
+import sys
+import uuid
+import httpx
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, task_model, task_options
+from tasks import classifier_prompt, INTENT_SYSTEM, CLARITY_SYSTEM, COMBINED_SYSTEM
+
+QUERIES = [
+    "what are your clinic hours",
+    "do you do invisalign?",
+    "book a cleaning in Bangalore tomorrow morning",
+    "my gums bleed when I brush",
+    "can you explain that again",
+    "is there a clinic near Koramangala open in the evening",
+]
+
+CLASSIFIERS = {
+    "intent_classify": INTENT_SYSTEM,
+    "clarity_classify": CLARITY_SYSTEM,
+    "combined_classify": COMBINED_SYSTEM,
+}
+
+
+def build_request(layout, system, query, stage):
+    payload = {"model": task_model(stage), "stream": False, "options": task_options(stage)}
+    if layout == "prefix":
+        payload.update(system=system, prompt=classifier_prompt(query), keep_alive=OLLAMA_KEEP_ALIVE)
+    elif layout == "inline":
+        payload["prompt"] = system + classifier_prompt(query)
+    else:
+        payload["prompt"] = f"Request {uuid.uuid4().hex}\n" + system + classifier_prompt(query)
+    return payload
+
+
+def run_layout(client, layout, rounds):
+    prefill_ms, total_ms, prompt_tokens = [], [], []
+    for _ in range(rounds):
+        # Interleave the classifiers the way concurrent turns do
+        for query in QUERIES:
+            for stage, system in CLASSIFIERS.items():
+                response = client.post("/api/generate", json=build_request(layout, system, query, stage))
+                response.raise_for_status()
+                body = response.json()
+                prefill_ms.append(body.get("prompt_eval_duration", 0) / 1e6)
+                total_ms.append(body.get("total_duration", 0) / 1e6)
+                prompt_tokens.append(body.get("prompt_eval_count", 0))
+    return prefill_ms, total_ms, prompt_tokens
+
+
+def run(rounds):
+    with httpx.Client(base_url=OLLAMA_BASE_URL, timeout=120) as client:
+        # Load the model first so the first layout does not pay for it
+        load = {"model": task_model("combined_classify"), "keep_alive": OLLAMA_KEEP_ALIVE, "options": task_options("combined_classify")}
+        client.post("/api/generate", json=load).raise_for_status()
+
+        print(f"{'layout':<8}{'calls':>7}{'prompt tok':>12}{'prefill p50':>13}{'prefill p95':>13}{'total p50':>11}")
+        for layout in ("cold", "inline", "prefix"):
+            prefill_ms, total_ms, prompt_tokens = run_layout(client, layout, rounds)
+            print(
+                f"{layout:<8}{len(prefill_ms):>7}{np.mean(prompt_tokens):>12.0f}"
+                f"{np.percentile(prefill_ms, 50):>10.1f} ms{np.percentile(prefill_ms, 95):>10.1f} ms"
+                f"{np.percentile(total_ms, 50):>8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the query set per layout")
+    args = parser.parse_args()
+    run(args.rounds)
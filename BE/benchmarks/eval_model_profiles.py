@@ -0,0 +1,142 @@
+"""Accuracy and latency of the classifiers per model profile.
+
+Builds a labeled set from data/FAQ.json (every question is a new, dental FAQ
+query) plus booking queries from Booking_Data.json and small hand-labeled
+vague, follow-up and non-dental sets, then runs each classifier stage's
+production prompt and schema against every candidate model. Run from the BE
+folder with the models pulled into Ollama:
+    python benchmarks/eval_model_profiles.py --models llama3 llama3.2:1b qwen2.5:0.5b
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import httpx
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, MODEL_PROFILES, task_options
+from models import Intent_Classification, DomainClassification, QueryClarity, CombinedClassification
+from tasks import classifier_prompt, INTENT_SYSTEM, DOMAIN_SYSTEM, CLARITY_SYSTEM, COMBINED_SYSTEM
+from utils import preprocess_text
+
+BE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# stage: (system prefix, schema, {schema field: label key})
+STAGES = {
+    "intent_classify": (INTENT_SYSTEM, Intent_Classification, {"class_type": "intent"}),
+    "domain_classify": (DOMAIN_SYSTEM, DomainClassification, {"class_type": "domain"}),
+    "clarity_classify": (CLARITY_SYSTEM, QueryClarity, {"class_type": "class_type"}),
+    "combined_classify": (
+        COMBINED_SYSTEM, CombinedClassification,
+        {"intent": "intent", "domain": "domain", "class_type": "class_type"}
+    ),
+}
+
+# Labels not given (None) are not scored for that query
+VAGUE = ["hi", "hello there", "I have a question", "can you help", "not sure", "hmm"]
+FOLLOW_UPS = ["can you explain that again", "what does that mean", "summarize that", "and the other one?", "do it again"]
+NON_DENTAL = [
+    "I need an eye checkup",
+    "what is a good skin care routine",
+    "can I see a dermatologist",
+    "book a general physician for my fever",
+    "where can I get an x-ray of my knee",
+]
+
+
+def build_eval_set(faq_limit=None):
+    with open(os.path.join(BE_DIR, "../data/FAQ.json")) as file:
+        faq_data = json.load(file)
+    with open(os.path.join(BE_DIR, "../data/Booking_Data.json")) as file:
+        booking_data = json.load(file)
+
+    examples = [
+        {"query": item["question"], "intent": "new_task", "domain": "dental", "class_type": "FAQ"}
+        for item in faq_data[:faq_limit]
+    ]
+    for clinic in booking_data:
+        city = clinic["location"]["city"]
+        specialty = clinic["specialties"][0].lower()
+        examples.append({"query": f"Book a {specialty} appointment in {city}", "intent": "new_task", "domain": "dental", "class_type": "Booking"})
+    examples += [{"query": query, "intent": None, "domain": None, "class_type": "Vague"} for query in VAGUE]
+    examples += [{"query": query, "intent": "continue", "domain": None, "class_type": None} for query in FOLLOW_UPS]
+    examples += [{"query": query, "intent": "new_task", "domain": "non-dental", "class_type": None} for query in NON_DENTAL]
+    return examples
+
+
+def classify(client, model, stage, query):
+    system, schema, _ = STAGES[stage]
+    payload = {
+        "model": model,
+        "system": system,
+        "prompt": classifier_prompt(query),
+        "stream": False,
+        "format": schema.model_json_schema(),
+        "options": task_options(stage),
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }
+    start = time.perf_counter()
+    response = client.post("/api/generate", json=payload)
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    try:
+        return preprocess_text(response.json().get("response", ""), schema), elapsed
+    except ValueError:
+        return None, elapsed
+
+
+def evaluate(client, model, stage, examples):
+    _, _, fields = STAGES[stage]
+    latencies, correct, scored, parse_failures = [], 0, 0, 0
+    for example in examples:
+        labels = {field: example[key] for field, key in fields.items() if example[key] is not None}
+        if not labels:
+            continue
+        predicted, elapsed = classify(client, model, stage, example["query"])
+        latencies.append(elapsed)
+        scored += 1
+        if predicted is None:
+            parse_failures += 1
+        elif all(predicted[field] == label for field, label in labels.items()):
+            correct += 1
+    return {
+        "model": model,
+        "stage": stage,
+        "queries": scored,
+        "accuracy": correct / scored if scored else None,
+        "parse_failures": parse_failures,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000 if latencies else None,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000 if latencies else None,
+    }
+
+
+def run(models, stages, faq_limit, output):
+    examples = build_eval_set(faq_limit)
+    results = []
+    print(f"{'model':<20}{'stage':<20}{'queries':>8}{'accuracy':>10}{'parse err':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    with httpx.Client(base_url=OLLAMA_BASE_URL, timeout=120) as client:
+        for model in models:
+            # Load the model up front so its first query is not timed with the load
+            client.post("/api/generate", json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE}).raise_for_status()
+            for stage in stages:
+                result = evaluate(client, model, stage, examples)
+                results.append(result)
+                print(
+                    f"{model:<20}{stage:<20}{result['queries']:>8}{result['accuracy']:>10.1%}"
+                    f"{result['parse_failures']:>10}{result['p50_ms']:>9.0f}{result['p95_ms']:>9.0f}"
+                )
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=[MODEL_PROFILES["classifier"]["model"]], help="Ollama models to compare")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--faq-limit", type=int, default=None, help="only use the first N FAQ questions")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args()
+    run(args.models, args.stages, args.faq_limit, args.output)
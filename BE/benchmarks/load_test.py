@@ -0,0 +1,205 @@
+"""End-to-end load test for /query (orchestrator) and /query_faq (RAG service).
+
+Starts the mock Ollama, the RAG service on the in-process NumPy index and
+the orchestrator as subprocesses on spare ports, then drives them with
+concurrent synthetic users built from data/FAQ.json and Booking_Data.json.
+Nothing outside this machine is needed once the embedding model is in the
+local Hugging Face cache. Run from the BE folder:
+    python benchmarks/load_test.py --users 20 --requests 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+from prometheus_client.parser import text_string_to_metric_families
+
+BE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MOCK_PORT, RAG_PORT, ORCHESTRATOR_PORT = 11500, 8041, 8031
+
+PARAPHRASES = ["{q}", "{q_lower}", "hi, {q_lower}", "quick question: {q_lower}", "{q_bare}"]
+
+
+def build_queries(seed=7):
+    random.seed(seed)
+    with open(os.path.join(BE_DIR, "../data/FAQ.json")) as file:
+        faq_data = json.load(file)
+    with open(os.path.join(BE_DIR, "../data/Booking_Data.json")) as file:
+        booking_data = json.load(file)
+
+    faq_queries = []
+    for item in faq_data:
+        question = item["question"]
+        variants = {"q": question, "q_lower": question.lower(), "q_bare": question.lower().rstrip("?")}
+        faq_queries.extend(template.format(**variants) for template in PARAPHRASES)
+
+    booking_queries = []
+    for clinic in booking_data:
+        city = clinic["location"]["city"]
+        booking_queries.append(f"Book an appointment in {city}")
+        for specialty in clinic["specialties"]:
+            booking_queries.append(f"I need a {specialty.lower()} appointment in {city}")
+        for slot in clinic["slots"]:
+            booking_queries.append(f"Any {slot} slots in {city}?")
+    return faq_queries, booking_queries
+
+
+def start_services(tmp_dir, args):
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{MOCK_PORT}",
+        "RAG_SERVICE_URL": f"http://127.0.0.1:{RAG_PORT}",
+        "VECTOR_BACKEND": "numpy",
+        "NUMPY_INDEX_PATH": os.path.join(tmp_dir, "faq_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp_dir, "embedding_cache.sqlite3"),
+        "ORCHESTRATOR_LOG_PATH": os.path.join(tmp_dir, "orchestrator.log"),
+        # Nothing listens here, so sessions fall back to the in-memory store
+        "REDIS_URL": "redis://127.0.0.1:1",
+        "SEMANTIC_CACHE_ENABLED": "0" if args.no_cache else "1",
+        "MOCK_CLASSIFY_LATENCY": str(args.classify_latency),
+        "MOCK_ANSWER_LATENCY": str(args.answer_latency),
+        "MOCK_PARALLEL": str(args.parallel),
+        "OLLAMA_NUM_PARALLEL": str(args.parallel),
+    }
+    commands = [
+        [sys.executable, "-m", "uvicorn", "mock_ollama:app", "--app-dir", "benchmarks", "--port", str(MOCK_PORT)],
+        [sys.executable, "-m", "uvicorn", "rag_implementations:app", "--port", str(RAG_PORT)],
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(ORCHESTRATOR_PORT)],
+    ]
+    return [
+        subprocess.Popen(command + ["--log-level", "warning"], cwd=BE_DIR, env=env)
+        for command in commands
+    ]
+
+
+async def wait_until_up(client, url, timeout=180):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(url)).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def run_users(client, url, make_payload, queries, users, requests_per_user):
+    latencies, errors = [], 0
+
+    async def user(user_index):
+        nonlocal errors
+        for _ in range(requests_per_user):
+            payload = make_payload(f"bench-user-{user_index}", random.choice(queries))
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def stage_breakdown(metrics_text):
+    sums, counts = {}, {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != "clinic_bot_stage_seconds":
+            continue
+        for sample in family.samples:
+            stage = sample.labels.get("stage")
+            if sample.name.endswith("_sum"):
+                sums[stage] = sample.value
+            elif sample.name.endswith("_count"):
+                counts[stage] = sample.value
+    return {stage: (counts[stage], sums[stage] / counts[stage] * 1000) for stage in sums if counts.get(stage)}
+
+
+def summarize(name, latencies, errors, elapsed):
+    total = len(latencies) + errors
+    result = {
+        "endpoint": name,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+    for q in (50, 95, 99):
+        result[f"p{q}_ms"] = float(np.percentile(latencies, q)) * 1000 if latencies else None
+    return result
+
+
+def print_report(results, stages):
+    print(f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        percentiles = "".join(f"{result[key]:>10.1f}" if result[key] is not None else f"{'-':>10}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{result['endpoint']:<12}{result['requests']:>10}{result['errors']:>8}{result['throughput_rps']:>10.2f}{percentiles}")
+
+    print(f"\n{'stage':<20}{'count':>8}{'mean ms':>10}")
+    for service, breakdown in stages.items():
+        for stage, (count, mean_ms) in sorted(breakdown.items()):
+            print(f"{service + '.' + stage:<20}{int(count):>8}{mean_ms:>10.1f}")
+
+
+async def run(args):
+    faq_queries, booking_queries = build_queries()
+    orchestrator_url = f"http://127.0.0.1:{ORCHESTRATOR_PORT}"
+    rag_url = f"http://127.0.0.1:{RAG_PORT}"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        processes = start_services(tmp_dir, args)
+        try:
+            limits = httpx.Limits(max_connections=args.users * 2)
+            async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+                for url in (f"http://127.0.0.1:{MOCK_PORT}/api/tags", f"{rag_url}/ready", f"{orchestrator_url}/ready"):
+                    await wait_until_up(client, url)
+                (await client.post(f"{rag_url}/create_faq_db")).raise_for_status()
+
+                results = []
+                latencies, errors, elapsed = await run_users(
+                    client, f"{rag_url}/query_faq", lambda user_id, query: {"query": query},
+                    faq_queries, args.users, args.requests
+                )
+                results.append(summarize("/query_faq", latencies, errors, elapsed))
+
+                latencies, errors, elapsed = await run_users(
+                    client, f"{orchestrator_url}/query", lambda user_id, query: {"user_id": user_id, "query": query},
+                    faq_queries + booking_queries, args.users, args.requests
+                )
+                results.append(summarize("/query", latencies, errors, elapsed))
+
+                stages = {
+                    "orchestrator": stage_breakdown((await client.get(f"{orchestrator_url}/metrics")).text),
+                    "rag": stage_breakdown((await client.get(f"{rag_url}/metrics")).text),
+                }
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+
+    print_report(results, stages)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"results": results, "stages": stages}, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10, help="concurrent synthetic users")
+    parser.add_argument("--requests", type=int, default=10, help="requests per user per endpoint")
+    parser.add_argument("--classify-latency", type=float, default=0.2, help="mock LLM latency for classifier calls (s)")
+    parser.add_argument("--answer-latency", type=float, default=0.8, help="mock LLM latency for answer calls (s)")
+    parser.add_argument("--parallel", type=int, default=4, help="mock LLM parallel slots")
+    parser.add_argument("--no-cache", action="store_true", help="disable the semantic answer cache")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args()
+    asyncio.run(run(args))
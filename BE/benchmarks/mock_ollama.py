@@ -0,0 +1,135 @@
+"""Local stand-in for the Ollama API with configurable latency.
+
+Answers classifier prompts with valid classification JSON and everything
+else with a short canned answer, so the orchestrator can be load-tested
+without a model. Run from the BE folder:
+    python benchmarks/mock_ollama.py --port 11500 --classify-latency 0.3 --answer-latency 1.0
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+CLASSIFY_LATENCY = float(os.getenv("MOCK_CLASSIFY_LATENCY", "0.2"))
+ANSWER_LATENCY = float(os.getenv("MOCK_ANSWER_LATENCY", "0.8"))
+TOKEN_LATENCY = float(os.getenv("MOCK_TOKEN_LATENCY", "0.02"))
+PARALLEL = int(os.getenv("MOCK_PARALLEL", "4"))
+
+ANSWER_TEXT = "Yes, we can help with that at any of our clinics. Please call us to confirm."
+BOOKING_WORDS = ("book", "slot", "appointment in", "schedule", "clinic in", "near me")
+
+app = FastAPI()
+slots = asyncio.Semaphore(PARALLEL)
+
+
+def user_query(prompt):
+    match = re.search(r'User Query:\s*"(.*)"', prompt, re.DOTALL)
+    return (match.group(1) if match else prompt).lower()
+
+
+def respond(prompt):
+    """(latency, text) for a prompt, mimicking what llama3 would return."""
+    if "<jsonstart>" not in prompt:
+        return ANSWER_LATENCY, ANSWER_TEXT
+
+    query = user_query(prompt)
+    class_type = "Booking" if any(word in query for word in BOOKING_WORDS) else "FAQ"
+    if len(query.split()) < 2:
+        class_type = "Vague"
+
+    if '"intent"' in prompt:
+        payload = {"intent": "new_task", "domain": "dental", "class_type": class_type}
+    elif "new_task" in prompt:
+        payload = {"class_type": "new_task"}
+    elif "non-dental" in prompt:
+        payload = {"class_type": "dental"}
+    else:
+        payload = {"class_type": class_type}
+    return CLASSIFY_LATENCY, f"<jsonstart>\n{json.dumps(payload)}\n<jsonend>"
+
+
+def prompt_from_body(body):
+    if "prompt" in body:
+        return (body.get("system") or "") + body["prompt"]
+    return "\n".join(message.get("content", "") for message in body.get("messages", []))
+
+
+def final_chunk(body, prompt, text, started):
+    return {
+        "model": body.get("model", "llama3"),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": int((time.perf_counter() - started) * 1e9),
+        "prompt_eval_count": len(prompt) // 4 + 1,
+        "eval_count": len(text) // 4 + 1,
+    }
+
+
+async def generate(body, chat):
+    prompt = prompt_from_body(body)
+    latency, text = respond(prompt)
+    if body.get("format"):
+        # Constrained generation returns the bare JSON object
+        text = text.replace("<jsonstart>", "").replace("<jsonend>", "").strip()
+    started = time.perf_counter()
+
+    def message(content):
+        return {"message": {"role": "assistant", "content": content}} if chat else {"response": content}
+
+    if not body.get("stream", True):
+        async with slots:
+            await asyncio.sleep(latency)
+        return {**message(text), **final_chunk(body, prompt, text, started)}
+
+    async def chunks():
+        async with slots:
+            # Time to first token, then a steady token rate
+            await asyncio.sleep(max(latency - TOKEN_LATENCY * len(text.split()), 0))
+            for word in re.findall(r"\S+\s*", text):
+                await asyncio.sleep(TOKEN_LATENCY)
+                yield json.dumps({**message(word), "done": False}) + "\n"
+        yield json.dumps({**message(""), **final_chunk(body, prompt, text, started)}) + "\n"
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+@app.post("/api/generate")
+async def api_generate(request: Request):
+    return await generate(await request.json(), chat=False)
+
+
+@app.post("/api/chat")
+async def api_chat(request: Request):
+    return await generate(await request.json(), chat=True)
+
+
+@app.post("/api/show")
+async def api_show():
+    return {"modelfile": "", "parameters": "", "template": "{{ .Prompt }}", "details": {}, "model_info": {}}
+
+
+@app.get("/api/tags")
+async def api_tags():
+    return {"models": [{"name": "llama3:latest", "model": "llama3:latest"}]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--classify-latency", type=float, default=CLASSIFY_LATENCY)
+    parser.add_argument("--answer-latency", type=float, default=ANSWER_LATENCY)
+    parser.add_argument("--token-latency", type=float, default=TOKEN_LATENCY)
+    parser.add_argument("--parallel", type=int, default=PARALLEL)
+    args = parser.parse_args()
+
+    os.environ["MOCK_CLASSIFY_LATENCY"] = str(args.classify_latency)
+    os.environ["MOCK_ANSWER_LATENCY"] = str(args.answer_latency)
+    os.environ["MOCK_TOKEN_LATENCY"] = str(args.token_latency)
+    os.environ["MOCK_PARALLEL"] = str(args.parallel)
+    uvicorn.run("mock_ollama:app", app_dir=os.path.dirname(os.path.abspath(__file__)), host="127.0.0.1", port=args.port, log_level="warning")
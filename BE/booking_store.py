@@ -0,0 +1,192 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import NamedTuple
+
+SLOT_NAMES = ("morning", "afternoon", "evening", "night")
+SLOT_ALIASES = {"tonight": "night", "today evening": "evening", "noon": "afternoon"}
+# When nothing matches every filter, drop them in this order until something does
+RELAX_ORDER = ("slot", "specialty", "city")
+STEM_SUFFIXES = ("ists", "ist", "ics", "ery", "eon", "ry", "al", "s")
+
+
+def stem(word):
+    """Crude suffix stripping so "orthodontist" meets "Orthodontics" and "dental" meets "Dentistry"."""
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in STEM_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[:-len(suffix)]
+                stripped = True
+                break
+    return word
+
+
+def word_stems(text):
+    return {stem(word) for word in re.findall(r"[a-z]+", text.lower())}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def compact_clinic(clinic):
+    """Just the fields the answer prompt needs."""
+    location = clinic["location"]
+    return {
+        "clinic_name": clinic["clinic_name"],
+        "address": f"{location['address']}, {location['city']}",
+        "contact_number": clinic["contact_number"],
+        "rating": clinic["rating"],
+        "specialties": clinic["specialties"],
+        "available_slots": [slot for slot, available in clinic["slots"].items() if available == "yes"],
+    }
+
+
+class BookingIndex(NamedTuple):
+    """One immutable build of the clinics and their indexes."""
+    clinics: list
+    by_city: dict
+    by_specialty: dict
+    by_slot: dict
+    grid: dict
+
+
+EMPTY_INDEX = BookingIndex([], {}, {}, {}, {})
+
+
+class BookingStore:
+    """Booking_Data.json held in memory with lookup indexes.
+
+    Clinics are indexed by city, specialty and available slot, plus a
+    lat/lon grid of `cell_degrees` cells for radius searches. The file is
+    re-read when its mtime or size changes, checked at most every
+    `check_interval` seconds. A reload swaps in a whole new BookingIndex, so
+    readers take `self.index` once and work on that.
+    """
+
+    def __init__(self, path, cell_degrees=0.5, check_interval=1.0):
+        self.path = path
+        self.cell_degrees = cell_degrees
+        self.check_interval = check_interval
+        self.index = EMPTY_INDEX
+        self._file_stamp = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def _build(self, clinics):
+        by_city, by_specialty, by_slot, grid = {}, {}, {}, {}
+        for i, clinic in enumerate(clinics):
+            location = clinic["location"]
+            by_city.setdefault(location["city"].lower(), set()).add(i)
+            for specialty in clinic["specialties"]:
+                by_specialty.setdefault(specialty.lower(), set()).add(i)
+            for slot, available in clinic["slots"].items():
+                if available == "yes":
+                    by_slot.setdefault(slot, set()).add(i)
+            grid.setdefault(self._cell(location["latitude"], location["longitude"]), []).append(i)
+        self.index = BookingIndex(clinics, by_city, by_specialty, by_slot, grid)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if not force and stamp == self._file_stamp:
+                return
+            with open(self.path) as file:
+                self._build(json.load(file))
+            self._file_stamp = stamp
+
+    def all(self):
+        self.refresh()
+        return self.index.clinics
+
+    def _nearby(self, index, latitude, longitude, radius_km):
+        lat_cells = math.ceil(radius_km / 111.0 / self.cell_degrees)
+        lon_span = radius_km / (111.0 * max(math.cos(math.radians(latitude)), 0.01))
+        lon_cells = math.ceil(lon_span / self.cell_degrees)
+        center_lat, center_lon = self._cell(latitude, longitude)
+
+        distances = {}
+        for lat_cell in range(center_lat - lat_cells, center_lat + lat_cells + 1):
+            for lon_cell in range(center_lon - lon_cells, center_lon + lon_cells + 1):
+                for i in index.grid.get((lat_cell, lon_cell), ()):
+                    location = index.clinics[i]["location"]
+                    distance = haversine_km(latitude, longitude, location["latitude"], location["longitude"])
+                    if distance <= radius_km:
+                        distances[i] = distance
+        return distances
+
+    def search(self, city=None, specialty=None, slot=None, latitude=None, longitude=None, radius_km=25.0, limit=5):
+        """Clinics matching the given filters, nearest (or best rated) first.
+
+        Returns (clinics, relaxed). If no clinic matches every filter, slot,
+        then specialty, then city are dropped until one does; `relaxed` lists
+        the filters that were dropped. A location radius is never relaxed.
+        """
+        self.refresh()
+        index = self.index
+        filters = {
+            "city": (city, index.by_city),
+            "specialty": (specialty, index.by_specialty),
+            "slot": (slot, index.by_slot),
+        }
+        candidate_sets = {name: lookup.get(value.lower(), set()) for name, (value, lookup) in filters.items() if value}
+
+        distances = None
+        if latitude is not None and longitude is not None:
+            distances = self._nearby(index, latitude, longitude, radius_km)
+        base = set(distances) if distances is not None else set(range(len(index.clinics)))
+
+        relaxed = []
+        matches = base.intersection(*candidate_sets.values())
+        for name in RELAX_ORDER:
+            if matches or name not in candidate_sets:
+                continue
+            del candidate_sets[name]
+            relaxed.append(name)
+            matches = base.intersection(*candidate_sets.values())
+
+        if distances is not None:
+            ordered = sorted(matches, key=lambda i: distances[i])
+        else:
+            ordered = sorted(matches, key=lambda i: -index.clinics[i]["rating"])
+        return [index.clinics[i] for i in ordered[:limit]], relaxed
+
+    def parse_query(self, text):
+        """Pull city, specialty and slot filters out of free text."""
+        self.refresh()
+        index = self.index
+        text = text.lower()
+        stems = word_stems(text)
+        filters = {}
+        for city in index.by_city:
+            if city in text:
+                filters["city"] = city
+                break
+        for specialty in index.by_specialty:
+            # Every word of the specialty has to be there, so "general" alone is not "General Dentistry"
+            if word_stems(specialty) <= stems:
+                filters["specialty"] = specialty
+                break
+        for alias, slot in SLOT_ALIASES.items():
+            if alias in text:
+                filters["slot"] = slot
+        for slot in SLOT_NAMES:
+            if slot in text:
+                filters["slot"] = slot
+                break
+        return filters
@@ -1,8 +1,168 @@
-from crewai import LLM
-
-REDIS_URL = "redis://localhost:6379"
-llm = LLM(
-    model="ollama/llama3",
-    temperature=0.2,
-    base_url="http://localhost:11434"
-)
\ No newline at end of file
+import os
+from functools import lru_cache
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://localhost:8040")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+LLM_TEMPERATURE = 0.2
+
+# Classifiers only emit a short JSON object: constrain it with Ollama's JSON
+# schema "format" (off = free text through CrewAI, parsed leniently), cap the
+# tokens generated, and retry an unparseable response this many times
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "1") == "1"
+CLASSIFIER_MAX_TOKENS = int(os.getenv("CLASSIFIER_MAX_TOKENS", "48"))
+# The separate intent/domain/clarity classifiers emit a single field, so they get a lower cap
+SINGLE_CLASSIFIER_MAX_TOKENS = int(os.getenv("SINGLE_CLASSIFIER_MAX_TOKENS", "24"))
+CLASSIFIER_RETRIES = int(os.getenv("CLASSIFIER_RETRIES", "1"))
+
+# Ollama keeps the model, and with it the KV cache of the static prompt
+# prefixes, loaded this long after the last request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Model profile per kind of task. The classifiers only pick between a few
+# labels, so they can run on a much smaller model (e.g. CLASSIFIER_MODEL=llama3.2:1b)
+# than answer generation; benchmarks/eval_model_profiles.py compares candidates.
+# num_ctx is left to the server unless set: a request with a different num_ctx
+# reloads the model and loses the cached prefixes, so profiles sharing a model
+# must agree on it.
+MODEL_PROFILES = {
+    "classifier": {
+        "model": os.getenv("CLASSIFIER_MODEL", OLLAMA_MODEL),
+        "temperature": 0,
+        "max_tokens": CLASSIFIER_MAX_TOKENS,
+        "num_ctx": int(os.getenv("CLASSIFIER_NUM_CTX", "0")) or None,
+    },
+    "answer": {
+        "model": os.getenv("ANSWER_MODEL", OLLAMA_MODEL),
+        "temperature": LLM_TEMPERATURE,
+        "max_tokens": int(os.getenv("ANSWER_MAX_TOKENS", "128")),
+        "num_ctx": int(os.getenv("ANSWER_NUM_CTX", "0")) or None,
+    },
+}
+
+# stage: (profile, max tokens if tighter than the profile's)
+TASK_PROFILES = {
+    "intent_classify": ("classifier", SINGLE_CLASSIFIER_MAX_TOKENS),
+    "domain_classify": ("classifier", SINGLE_CLASSIFIER_MAX_TOKENS),
+    "clarity_classify": ("classifier", SINGLE_CLASSIFIER_MAX_TOKENS),
+    "combined_classify": ("classifier", None),
+    "answer_llm": ("answer", None),
+}
+
+
+def ollama_options(profile, max_tokens=None):
+    options = {"temperature": profile["temperature"], "num_predict": max_tokens or profile["max_tokens"]}
+    if profile["num_ctx"]:
+        options["num_ctx"] = profile["num_ctx"]
+    return options
+
+
+def task_model(stage):
+    return MODEL_PROFILES[TASK_PROFILES[stage][0]]["model"]
+
+
+def task_options(stage):
+    profile, max_tokens = TASK_PROFILES[stage]
+    return ollama_options(MODEL_PROFILES[profile], max_tokens)
+
+
+def crewai_llm(profile):
+    # CrewAI takes seconds to import, so the LLM clients are only built on first use
+    from crewai import LLM
+
+    extra = {"num_ctx": profile["num_ctx"]} if profile["num_ctx"] else {}
+    # Ollama resets a model's keep-alive on every request, so these calls must send it too
+    return LLM(
+        model=f"ollama/{profile['model']}",
+        temperature=profile["temperature"],
+        max_tokens=profile["max_tokens"],
+        base_url=OLLAMA_BASE_URL,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        **extra
+    )
+
+
+@lru_cache(maxsize=None)
+def get_llm():
+    return crewai_llm(MODEL_PROFILES["answer"])
+
+
+@lru_cache(maxsize=None)
+def get_classifier_llm():
+    return crewai_llm(MODEL_PROFILES["classifier"])
+
+
+# Keep in step with the OLLAMA_NUM_PARALLEL the Ollama server was started with
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+# LLM scheduler: lower priority numbers get a free Ollama slot first, and a call
+# that cannot start within its queue deadline (seconds) is shed with a fallback reply
+LLM_CLASSIFY_DEADLINE = float(os.getenv("LLM_CLASSIFY_DEADLINE", "5"))
+LLM_ANSWER_DEADLINE = float(os.getenv("LLM_ANSWER_DEADLINE", "15"))
+# Batch work only gets slots live users are not waiting for; 0 means it waits as long as it takes
+LLM_BATCH_DEADLINE = float(os.getenv("LLM_BATCH_DEADLINE", "0")) or None
+LLM_SCHEDULING = {
+    # stage: (priority, queue deadline)
+    "intent_classify": (0, LLM_CLASSIFY_DEADLINE),
+    "clarity_classify": (0, LLM_CLASSIFY_DEADLINE),
+    "combined_classify": (0, LLM_CLASSIFY_DEADLINE),
+    "answer_llm": (1, LLM_ANSWER_DEADLINE),
+    # Every stage of a /query/batch turn
+    "batch": (2, LLM_BATCH_DEADLINE),
+}
+LLM_BUSY_REPLY = "We're handling a lot of requests right now. Please try again in a moment."
+
+# /query/batch and /query_faq/batch: at most BATCH_MAX_QUERIES per request,
+# BATCH_MAX_PARALLEL conversations in flight at once (LLM calls are still
+# capped by OLLAMA_NUM_PARALLEL), and FAQ lookups embedded and searched
+# FAQ_BATCH_CHUNK queries at a time
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "10000"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", str(2 * OLLAMA_NUM_PARALLEL)))
+FAQ_BATCH_CHUNK = int(os.getenv("FAQ_BATCH_CHUNK", "256"))
+
+# "combined" classifies intent, domain and query type in one LLM call,
+# "separate" runs the intent and query clarity classifiers individually
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "combined")
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Local embedding router in front of the classifier LLM calls. Queries it is
+# less confident about than the threshold still go to the LLM classifiers.
+PRE_CLASSIFIER_ENABLED = os.getenv("PRE_CLASSIFIER_ENABLED", "1") == "1"
+PRE_CLASSIFIER_THRESHOLD = float(os.getenv("PRE_CLASSIFIER_THRESHOLD", "0.85"))
+PRE_CLASSIFIER_MIN_SIMILARITY = float(os.getenv("PRE_CLASSIFIER_MIN_SIMILARITY", "0.6"))
+
+# Semantic answer cache for queries with no prior conversation context
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_SIZE = int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", "1024"))
+
+# Micro-batching window for query embeddings in the RAG service
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+# FAQ vector index backend: "milvus" (standalone server) or "numpy" (in-process,
+# persisted to NUMPY_INDEX_PATH.npy/.json)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "milvus")
+NUMPY_INDEX_PATH = os.getenv("NUMPY_INDEX_PATH", "../data/faq_index")
+
+# Embeddings keyed by model name and content hash, shared by ingestion and queries
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "../data/embedding_cache.sqlite3")
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "4096"))
+
+# Conversation context: sessions expire SESSION_TTL seconds after the last turn,
+# keep at most SESSION_MAX_TURNS turns, and the answer prompt only gets the
+# newest context that fits in CONTEXT_TOKEN_BUDGET tokens
+SESSION_TTL = int(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "10"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
+
+# Speech service worker pool: SPEECH_WORKERS processes, and at most
+# SPEECH_MAX_QUEUE jobs waiting for one before requests get a 503
+SPEECH_WORKERS = int(os.getenv("SPEECH_WORKERS", "2"))
+SPEECH_MAX_QUEUE = int(os.getenv("SPEECH_MAX_QUEUE", "8"))
+
+ORCHESTRATOR_LOG_PATH = os.getenv("ORCHESTRATOR_LOG_PATH", "orchestrator.log")
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding store with an in-memory LRU in front.
+
+    Vectors are stored as float32 blobs keyed by (model name, content hash),
+    so switching models never returns stale vectors.
+    """
+
+    def __init__(self, path, model_name, memory_size=4096):
+        self.path = path
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._db.commit()
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get_many(self, texts):
+        """Return {text: vector} for the texts already cached."""
+        found = {}
+        missing = {}
+        with self._lock:
+            for text in texts:
+                key = text_hash(text)
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[text] = self.memory[key]
+                else:
+                    missing[key] = text
+
+            keys = list(missing)
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *chunk]
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    found[missing[key]] = vector
+        return found
+
+    def put_many(self, texts, vectors):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = text_hash(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((self.model_name, key, vector.tobytes()))
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._db.commit()
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import numpy as np
+from config import EMBEDDING_MODEL_NAME, EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_SIZE
+from embedding_cache import EmbeddingCache
+from metrics import record_cache
+
+_embedding_model = None
+_embedding_cache = None
+_model_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """Load the shared SentenceTransformer on first use."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _model_lock:
+            if _embedding_model is None:
+                # Pulls in torch, so only import it when the model is actually needed
+                from sentence_transformers import SentenceTransformer
+
+                _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _embedding_model
+
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None and EMBEDDING_CACHE_ENABLED:
+        with _model_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    EMBEDDING_CACHE_PATH, EMBEDDING_MODEL_NAME, memory_size=EMBEDDING_CACHE_MEMORY_SIZE
+                )
+    return _embedding_cache
+
+
+def encode(texts):
+    """Encode a list of texts into unit-length float32 vectors.
+
+    Texts seen before (by content hash, per model) come from the embedding
+    cache; only the rest are sent to the model, in a single batch.
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return get_embedding_model().encode(texts, normalize_embeddings=True)
+
+    cached = cache.get_many(texts)
+    missing = list(dict.fromkeys(text for text in texts if text not in cached))
+    record_cache("embedding", True, len(texts) - len(missing))
+    record_cache("embedding", False, len(missing))
+    if missing:
+        vectors = get_embedding_model().encode(missing, normalize_embeddings=True)
+        cache.put_many(missing, vectors)
+        cached.update(zip(missing, np.asarray(vectors, dtype=np.float32)))
+    return np.stack([cached[text] for text in texts]) if texts else np.empty((0, 0), dtype=np.float32)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text encode requests into batched encode calls.
+
+    The first queued request opens a window of `max_wait_ms`; everything that
+    arrives within it (up to `max_batch_size`) is encoded together.
+    """
+
+    def __init__(self, max_batch_size=32, max_wait_ms=5):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def encode(self, text):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await asyncio.to_thread(encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
@@ -0,0 +1,134 @@
+import asyncio
+import random
+import time
+import httpx
+from metrics import current_request_id, REQUEST_ID_HEADER
+
+_shared_client = None
+
+
+def get_http_client():
+    """Process-wide AsyncClient so inter-service calls reuse keep-alive connections."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+            timeout=httpx.Timeout(10.0)
+        )
+    return _shared_client
+
+
+async def close_http_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling a service after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds one trial call is let through; its result
+    closes the circuit again or keeps it open for another period.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """Free the half-open slot of a trial call that ended without a result."""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ServiceClient:
+    """Calls to one backend service with per-endpoint timeouts, retries and a circuit breaker."""
+
+    def __init__(self, name, base_url, timeouts=None, default_timeout=10.0, retries=2, backoff=0.1, breaker=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    async def request(self, method, path, **kwargs):
+        trial = self.breaker.state == "half-open"
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open, skipping call to {path}")
+
+        timeout = self.timeouts.get(path, self.default_timeout)
+        request_id = current_request_id()
+        if request_id:
+            kwargs["headers"] = {**kwargs.get("headers", {}), REQUEST_ID_HEADER: request_id}
+        try:
+            return await self._attempt(method, path, timeout, kwargs)
+        except BaseException:
+            # A trial call that is cancelled must not hold the half-open slot forever
+            if trial:
+                self.breaker.release_trial()
+            raise
+
+    async def _attempt(self, method, path, timeout, kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                response = await get_http_client().request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+                if response.status_code < 500:
+                    # 4xx means the service is up; it is the caller's problem, not a reason to trip
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                error = httpx.HTTPStatusError(f"{response.status_code} from {path}", request=response.request, response=response)
+            except httpx.HTTPStatusError:
+                raise
+            except httpx.HTTPError as e:
+                # Transport errors, but also e.g. an undecodable body: the call did not succeed
+                error = e
+
+            if attempt == self.retries:
+                self.breaker.record_failure()
+                raise error
+            # Exponential backoff with jitter so retries from many requests don't line up
+            await asyncio.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
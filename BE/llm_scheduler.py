@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from metrics import record_llm_queue, record_llm_wait, record_llm_shed
+
+
+class LoadShedError(Exception):
+    """An LLM call was rejected because it could not start before its deadline."""
+
+
+class LLMScheduler:
+    """Hands out the LLM backend's parallel slots by priority.
+
+    At most `slots` calls run at once. Waiting calls are admitted lowest
+    priority number first (classifiers ahead of answer generation), FIFO
+    within a priority. A call whose estimated wait already exceeds its
+    deadline is shed straight away, and one still queued when the deadline
+    passes is shed then; either way it raises LoadShedError without reaching
+    the backend.
+    """
+
+    def __init__(self, slots, ewma_alpha=0.2):
+        self.slots = slots
+        self.active = 0
+        self.ewma_alpha = ewma_alpha
+        # Mean slot hold time per stage, for estimating queue waits
+        self.service_seconds = {}
+        self.shed = 0
+        self._queue = []
+        self._waiting = 0
+        self._order = itertools.count()
+
+    def estimated_wait(self, priority):
+        """Rough seconds until a new call at `priority` would get a slot."""
+        if self.active < self.slots and not self._waiting:
+            return 0.0
+        # Everything queued at the same or a better priority runs first, spread over the slots
+        ahead = sum(
+            self.service_seconds.get(stage, 0.0)
+            for entry_priority, _, stage, future in self._queue
+            if entry_priority <= priority and not future.done()
+        )
+        return ahead / self.slots
+
+    def _update(self):
+        record_llm_queue(self._waiting, self.active)
+
+    def _release(self):
+        # Hand the slot straight to the next live waiter, or give it back
+        while self._queue:
+            _, _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _shed(self, stage, reason):
+        self.shed += 1
+        record_llm_shed(stage)
+        raise LoadShedError(f"{stage}: {reason}")
+
+    async def _acquire(self, stage, priority, deadline):
+        if self.active < self.slots and not self._waiting:
+            self.active += 1
+            return
+        if deadline is not None and self.estimated_wait(priority) > deadline:
+            self._shed(stage, "estimated queue wait exceeds the deadline")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), stage, future))
+        self._waiting += 1
+        self._update()
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # The slot may have been handed over just as we gave up; pass it on
+            if future.done() and not future.cancelled():
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed(stage, "no slot free before the deadline")
+            raise
+        finally:
+            self._waiting -= 1
+            self._update()
+
+    @asynccontextmanager
+    async def slot(self, stage, priority=0, deadline=None):
+        """Hold one backend slot; `deadline` is the longest queue wait accepted, in seconds."""
+        enqueued = time.perf_counter()
+        await self._acquire(stage, priority, deadline)
+        started = time.perf_counter()
+        record_llm_wait(stage, started - enqueued)
+        self._update()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            previous = self.service_seconds.get(stage, elapsed)
+            self.service_seconds[stage] = previous + self.ewma_alpha * (elapsed - previous)
+            self._release()
+            self._update()
+
+    def stats(self):
+        return {
+            "slots": self.slots,
+            "active": self.active,
+            "waiting": self._waiting,
+            "shed": self.shed,
+            "service_seconds": {stage: round(seconds, 3) for stage, seconds in self.service_seconds.items()},
+        }
@@ -1,80 +1,294 @@
+import startup_profile
+startup_profile.install()
+
+import asyncio
+import contextvars
+import json
+import time
 import uvicorn
-from fastapi import FastAPI
-from models import QueryInput
-from config import llm
-from agents import intent_agent, domain_agent, query_clarity_agent
-from tasks import classify_intent, query_clarity, answer
-from utils import preprocess_text, query_booking_rag, get_booking_data
-import logging
-
-app = FastAPI()
-
-orchestrator_logs = logging.getLogger("orchestrator")
-orchestrator_logs.setLevel(logging.INFO)
-
-# Prevent duplicate handlers if reloaded
-if not orchestrator_logs.hasHandlers():
-    file_handler = logging.FileHandler("orchestrator.log", mode="a+")
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    file_handler.setFormatter(formatter)
-    orchestrator_logs.addHandler(file_handler)
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from models import QueryInput, BatchQueryInput, Intent_Classification, QueryClarity, CombinedClassification
+from config import (
+    get_llm, get_classifier_llm, OLLAMA_NUM_PARALLEL, CLASSIFIER_MODE, PRE_CLASSIFIER_ENABLED,
+    STRUCTURED_OUTPUT_ENABLED, CLASSIFIER_RETRIES, BATCH_MAX_QUERIES, BATCH_MAX_PARALLEL,
+    task_model, task_options,
+    LLM_SCHEDULING, LLM_BUSY_REPLY,
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_MAX_SIZE,
+    REDIS_URL, SESSION_TTL, SESSION_MAX_TURNS, ORCHESTRATOR_LOG_PATH
+)
+from tasks import (
+    classify_intent, query_clarity, classify_combined, answer, answer_prompt, classifier_prompt,
+    INTENT_SYSTEM, CLARITY_SYSTEM, COMBINED_SYSTEM, ANSWER_SYSTEM
+)
+from utils import preprocess_text, query_faq, query_faq_batch, get_booking_data
+from pre_classifier import pre_classify, get_pre_classifier
+from embeddings import encode, get_embedding_model
+from semantic_cache import SemanticCache, hash_context
+from session_store import create_session_store
+from ollama_client import stream_generate, generate_structured, warm_up_model
+from http_client import close_http_client
+from metrics import (
+    instrument, observe_stage, record_cache, record_parse_failure,
+    current_request_id, current_stage_timings, reset_stage_timings
+)
+from structured_logging import setup_json_logger
+from single_flight import SingleFlight, normalize
+from llm_scheduler import LLMScheduler, LoadShedError
+from warmup import Warmup
 
-# Optional: avoid logs being passed to root logger
-orchestrator_logs.propagate = False
+def load_local_models():
+    # Building the pre-classifier encodes its examples, which loads the embedding model too
+    if PRE_CLASSIFIER_ENABLED:
+        get_pre_classifier()
+    elif SEMANTIC_CACHE_ENABLED:
+        get_embedding_model()
 
-# User context store
-user_context_store = {}
 
-@app.post("/query")
-async def process_query(data: QueryInput):
-    user_id = data.user_id
-    
-    query = data.query
+def load_llm_clients():
+    get_llm()
+    if not STRUCTURED_OUTPUT_ENABLED:
+        get_classifier_llm()
 
-    # Get or initialize context
-    previous_context = user_context_store.get(user_id, [])
 
-    # Check if this is a continuation or new task
-    continue_check = preprocess_text(classify_intent(query, intent_agent, llm))
-    if continue_check["class_type"] == "new_task":
-        previous_context = []  # Clear context on new task
+async def load_ollama_models():
+    # Each stage's model, loaded with its own options and its prompt prefix prefilled
+    if CLASSIFIER_MODE == "combined":
+        systems = {"combined_classify": COMBINED_SYSTEM}
+    else:
+        systems = {"intent_classify": INTENT_SYSTEM, "clarity_classify": CLARITY_SYSTEM}
+    systems["answer_llm"] = ANSWER_SYSTEM
+    for stage, system in systems.items():
+        await warm_up_model(task_model(stage), [system], task_options(stage))
 
-    # Process the query using classification agent
-    query_details = preprocess_text(query_clarity(query, query_clarity_agent, llm))
-    print("Query Details:", query_details)
 
-    if query_details["class_type"].lower() == "faq":
-        rag_response = query_booking_rag(query)
+warmup = Warmup("orchestrator", [
+    ("local_models", load_local_models),
+    ("llm_clients", load_llm_clients),
+    ("ollama_models", load_ollama_models),
+])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in the background; requests before /ready load them on demand
+    warmup.start()
+    yield
+    await close_http_client()
+
+
+app = FastAPI(lifespan=lifespan)
+instrument(app)
+warmup.attach(app)
+
+# JSON lines, one record per turn, rotated at 10 MB
+orchestrator_logs = setup_json_logger("orchestrator", ORCHESTRATOR_LOG_PATH)
+
+# User context store (Redis when available, bounded in-memory otherwise)
+user_context_store = create_session_store(REDIS_URL, ttl=SESSION_TTL, max_turns=SESSION_MAX_TURNS)
+
+response_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL,
+    max_size=SEMANTIC_CACHE_MAX_SIZE
+)
+
+# Hands out the parallel slots Ollama was started with, classifiers first,
+# and sheds calls that would wait past their deadline
+llm_scheduler = LLMScheduler(OLLAMA_NUM_PARALLEL)
+
+# Concurrent identical (normalized) requests share one classification,
+# retrieval and, for turns without history, one answer generation
+classify_flight = SingleFlight("coalesce_classify")
+fetch_flight = SingleFlight("coalesce_fetch")
+answer_flight = SingleFlight("coalesce_answer")
+
+# FAQ lookups fetched ahead of time by /query/batch, {query: /query_faq response}
+faq_prefetch_var = contextvars.ContextVar("faq_prefetch", default=None)
+# Set for /query/batch turns, whose LLM calls queue behind interactive ones
+batch_var = contextvars.ContextVar("batch", default=False)
+
+
+def llm_slot(stage):
+    priority, deadline = LLM_SCHEDULING["batch" if batch_var.get() else stage]
+    return llm_scheduler.slot(stage, priority, deadline)
+
+
+async def run_llm_task(stage, task_fn, *args):
+    # llm.call blocks, so run it in a worker thread to keep the event loop free
+    with observe_stage(stage):
+        async with llm_slot(stage):
+            return await asyncio.to_thread(task_fn, *args)
+
+
+# stage -> (static system prefix, CrewAI fallback, output schema)
+CLASSIFIERS = {
+    "intent_classify": (INTENT_SYSTEM, classify_intent, Intent_Classification),
+    "clarity_classify": (CLARITY_SYSTEM, query_clarity, QueryClarity),
+    "combined_classify": (COMBINED_SYSTEM, classify_combined, CombinedClassification),
+}
+
+
+async def run_classifier(stage, query):
+    """Run a classifier and parse its output, retrying an unparseable response."""
+    system, task_fn, schema = CLASSIFIERS[stage]
+    for attempt in range(CLASSIFIER_RETRIES + 1):
+        if STRUCTURED_OUTPUT_ENABLED:
+            with observe_stage(stage):
+                async with llm_slot(stage):
+                    response = await generate_structured(
+                        classifier_prompt(query), schema.model_json_schema(),
+                        system=system, model=task_model(stage), options=task_options(stage), stage=stage
+                    )
+        else:
+            response = await run_llm_task(stage, task_fn, query, get_classifier_llm())
+        try:
+            return preprocess_text(response, schema)
+        except ValueError as e:
+            record_parse_failure(stage)
+            print(f"{stage}: unparseable response on attempt {attempt + 1}: {response!r}")
+            error = e
+    raise error
+
+
+async def classify(stage, query):
+    details, _ = await classify_flight.do((stage, normalize(query)), run_classifier, stage, query)
+    return dict(details)
+
+
+async def load_context(query, class_type):
+    if class_type == "faq":
+        with observe_stage("faq_fetch"):
+            faq_data = (faq_prefetch_var.get() or {}).get(query) or await query_faq(query)
+        response_cache.sync_version(faq_data.get("version"))
+        rag_response = faq_data.get("matches", [])
         print("FAQ RAG:", rag_response)
-        previous_context.append({
+        return {
             "agent_type": "query_clarity_agent",
+            "class_type": class_type,
             "query": query,
             "result": rag_response
-        })
-    elif query_details["class_type"].lower() == "booking":
-        booking_data = get_booking_data()
-        previous_context.append({
+        }
+    elif class_type == "booking":
+        with observe_stage("booking_fetch"):
+            booking_data = await get_booking_data(query)
+        return {
             "agent_type": "query_clarity_agent",
+            "class_type": class_type,
             "query": query,
             "result": booking_data
-        })
-    elif query_details["class_type"].lower() == "vague":
-        previous_context.append({
+        }
+    elif class_type == "vague":
+        return {
             "agent_type": "query_clarity_agent",
+            "class_type": class_type,
             "query": query,
             "result": "The query seems vague. Could you please elaborate?"
-        })
-    else:
-        previous_context.append({
-            "agent_type": "domain_agent",
-            "query": query,
-            "result": "Please ask a question related to Booking/FAQ"
-        })
+        }
+    return {
+        "agent_type": "domain_agent",
+        "class_type": class_type,
+        "query": query,
+        "result": "Please ask a question related to Booking/FAQ"
+    }
+
+
+async def fetch_context(query, class_type):
+    context_entry, _ = await fetch_flight.do((class_type, normalize(query)), load_context, query, class_type)
+    return {**context_entry, "query": query}
+
+
+async def generate_answer(query, turn):
+    """Answer for a turn; returns (response, coalesced)."""
+    if len(turn["context"]) > 1:
+        # Conversation history makes the prompt specific to this user
+        return await run_llm_task("answer_llm", answer, query, turn["context"], get_llm()), False
+    key = (normalize(query), hash_context(turn["context_entry"]["result"]))
+    return await answer_flight.do(key, run_llm_task, "answer_llm", answer, query, turn["context"], get_llm())
+
+
+async def check_continuation(query):
+    return await classify("intent_classify", query)
+
+
+async def clarify_and_fetch(query):
+    # The FAQ/booking fetch only depends on the clarity result, so it can
+    # start while the intent classifier is still running
+    query_details = await classify("clarity_classify", query)
+    print("Query Details:", query_details)
+    context_entry = await fetch_context(query, query_details["class_type"].lower())
+    return query_details, context_entry
 
-    # Final answer generation
-    final_response = answer(query, previous_context, llm)
+
+async def classify_and_fetch(query, has_context):
+    if PRE_CLASSIFIER_ENABLED:
+        with observe_stage("pre_classify"):
+            local_details = await asyncio.to_thread(pre_classify, query)
+        record_cache("pre_classifier", local_details is not None)
+        if local_details is not None:
+            print("Query Details (local):", local_details)
+            context_task = fetch_context(query, local_details["class_type"].lower())
+            if not has_context:
+                # Nothing to continue from, so the intent classifier can be skipped too
+                return {"class_type": "new_task"}, await context_task
+            return await asyncio.gather(check_continuation(query), context_task)
+
+    if CLASSIFIER_MODE == "combined":
+        # One LLM call returns intent, domain and query type together
+        details = await classify("combined_classify", query)
+        print("Query Details:", details)
+        class_type = details["class_type"].lower() if details["domain"] == "dental" else "non-dental"
+        context_entry = await fetch_context(query, class_type)
+        return {"class_type": details["intent"]}, context_entry
+
+    # Intent and query clarity classification are independent, run them concurrently
+    continue_check, (query_details, context_entry) = await asyncio.gather(
+        check_continuation(query),
+        clarify_and_fetch(query)
+    )
+    return continue_check, context_entry
+
+
+async def prepare_turn(user_id, query):
+    """Classify, fetch context and check the answer cache for one turn."""
+    started_at = time.perf_counter()
+    # Get or initialize context
+    previous_context = await asyncio.to_thread(user_context_store.get, user_id)
+
+    continue_check, context_entry = await classify_and_fetch(query, bool(previous_context))
+    if continue_check["class_type"] == "new_task":
+        previous_context = []  # Clear context on new task
+
+    previous_context.append(context_entry)
+    turn = {
+        "started_at": started_at,
+        "intent": continue_check["class_type"],
+        "context": previous_context,
+        "context_entry": context_entry,
+        "cache_key": None,
+        "cached_response": None,
+        "coalesced": False,
+        "shed": False
+    }
+
+    # Answers that only depend on this turn's retrieval can be shared across users
+    if SEMANTIC_CACHE_ENABLED and len(previous_context) == 1:
+        with observe_stage("cache_lookup"):
+            query_vector = (await asyncio.to_thread(encode, [query]))[0]
+            context_hash = hash_context(context_entry["result"])
+            turn["cache_key"] = (query_vector, context_hash)
+            turn["cached_response"] = response_cache.lookup(query_vector, context_hash)
+        record_cache("semantic_response", turn["cached_response"] is not None)
+    return turn
+
+
+async def complete_turn(user_id, query, turn, final_response, llm_seconds=None):
+    """Cache the generated answer and persist the turn."""
+    if llm_seconds is not None and turn["cache_key"] is not None:
+        response_cache.store(*turn["cache_key"], final_response, llm_seconds)
+
+    previous_context = turn["context"]
     previous_context.append({
         "agent_type": "answer_agent",
         "query": query,
@@ -82,12 +296,185 @@ async def process_query(data: QueryInput):
     })
 
     # Update context store
-    user_context_store[user_id] = previous_context
+    await asyncio.to_thread(user_context_store.set, user_id, previous_context)
     
-    orchestrator_logs.info(f"{user_id} | Query: {query}")
-    orchestrator_logs.info(f"{user_id} | Response: {final_response}")
+    orchestrator_logs.info("turn", extra={"fields": {
+        "user_id": user_id,
+        "request_id": current_request_id(),
+        "query": query,
+        "response": final_response,
+        "class_type": turn["context_entry"]["class_type"],
+        "intent": turn["intent"],
+        "cached": turn["cached_response"] is not None,
+        "coalesced": turn["coalesced"],
+        "shed": turn["shed"],
+        "latency_ms": round((time.perf_counter() - turn["started_at"]) * 1000, 2),
+        "stage_timings_ms": current_stage_timings()
+    }})
+
+
+def fallback_answer(turn):
+    """Reply for a turn whose answer generation was shed: the best FAQ match if there is one."""
+    context_entry = turn["context_entry"]
+    if context_entry["class_type"] == "faq" and context_entry["result"]:
+        return context_entry["result"][0]
+    return LLM_BUSY_REPLY
+
+
+async def run_turn(user_id, query):
+    """Answer one query; returns (response, shed), shed meaning the reply is a fallback."""
+    with observe_stage("query"):
+        try:
+            turn = await prepare_turn(user_id, query)
+        except LoadShedError as e:
+            # Without a classification there is nothing worth keeping in the session
+            print(f"Shed: {e}")
+            return LLM_BUSY_REPLY, True
+
+        # Final answer generation
+        final_response = turn["cached_response"]
+        llm_seconds = None
+        if final_response is None:
+            start = time.perf_counter()
+            try:
+                final_response, turn["coalesced"] = await generate_answer(query, turn)
+                # Only the request that generated a shared answer stores it in the cache
+                if not turn["coalesced"]:
+                    llm_seconds = time.perf_counter() - start
+            except LoadShedError as e:
+                print(f"Shed: {e}")
+                final_response = fallback_answer(turn)
+                turn["shed"] = True
+
+        await complete_turn(user_id, query, turn, final_response, llm_seconds)
+    return final_response, turn["shed"]
+
+
+@app.post("/query")
+async def process_query(data: QueryInput):
+    response, _ = await run_turn(data.user_id, data.query)
+    return {"response": response}
+
+
+@app.post("/query/batch")
+async def process_query_batch(data: BatchQueryInput):
+    """JSON lines, one {"index", "user_id", "query", "response" or "error"} per query, as each finishes.
+
+    A user's queries run in order, so later ones see the earlier turns as
+    context; different users run concurrently, up to max_parallel at a time.
+    FAQ retrieval for the whole batch is prefetched in one /query_faq/batch call.
+    LLM calls queue behind interactive traffic; a line whose response is only
+    the fallback for a shed call also has "shed": true.
+    """
+    if len(data.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUERIES} queries per batch.")
+    conversations = {}
+    for index, item in enumerate(data.queries):
+        conversations.setdefault(item.user_id, []).append((index, item.query))
+    slots = asyncio.Semaphore(min(data.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL))
+
+    async def run_conversation(user_id, turns, results):
+        async with slots:
+            for index, query in turns:
+                reset_stage_timings()
+                line = {"index": index, "user_id": user_id, "query": query}
+                try:
+                    line["response"], shed = await run_turn(user_id, query)
+                    if shed:
+                        line["shed"] = True
+                except Exception as e:
+                    line["error"] = str(e)
+                await results.put(line)
+
+    async def lines():
+        # Everything started from here, classification and answers alike, runs at batch priority
+        batch_var.set(True)
+        # Booking queries are looked up too; one batched embed + search is cheaper than sorting them out first
+        with observe_stage("faq_prefetch"):
+            faq_prefetch_var.set(await query_faq_batch(list(dict.fromkeys(item.query for item in data.queries))))
+        results = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(run_conversation(user_id, turns, results))
+            for user_id, turns in conversations.items()
+        ]
+        try:
+            for _ in range(len(data.queries)):
+                yield json.dumps(await results.get()) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.post("/query/stream")
+async def stream_query(data: QueryInput):
+    """Server-sent events: classification progress, answer tokens, then the full response."""
+    user_id = data.user_id
+    query = data.query
+
+    async def events():
+        yield sse_event("status", {"stage": "classifying"})
+        try:
+            turn = await prepare_turn(user_id, query)
+        except LoadShedError:
+            yield sse_event("token", {"text": LLM_BUSY_REPLY})
+            yield sse_event("done", {"response": LLM_BUSY_REPLY})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield sse_event("status", {"stage": "classified", "class_type": turn["context_entry"]["class_type"]})
+
+        final_response = turn["cached_response"]
+        llm_seconds = None
+        if final_response is not None:
+            yield sse_event("token", {"text": final_response})
+        else:
+            yield sse_event("status", {"stage": "generating"})
+            tokens = []
+            start = time.perf_counter()
+            try:
+                with observe_stage("answer_llm"):
+                    async with llm_slot("answer_llm"):
+                        async for token in stream_generate(answer_prompt(query, turn["context"]), system=ANSWER_SYSTEM, stage="answer_llm"):
+                            tokens.append(token)
+                            yield sse_event("token", {"text": token})
+            except LoadShedError:
+                # Shed before the first token, so the fallback is the whole reply
+                turn["shed"] = True
+                tokens = [fallback_answer(turn)]
+                yield sse_event("token", {"text": tokens[0]})
+            except Exception as e:
+                yield sse_event("error", {"detail": str(e)})
+                return
+            final_response = "".join(tokens).strip()
+            if not turn["shed"]:
+                llm_seconds = time.perf_counter() - start
+
+        await complete_turn(user_id, query, turn, final_response, llm_seconds)
+        yield sse_event("done", {"response": final_response})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/llm/stats")
+def llm_stats():
+    return llm_scheduler.stats()
+
 
-    return {"response": final_response}
+@app.post("/cache/invalidate")
+def invalidate_cache():
+    response_cache.invalidate()
+    return {"status": "success"}
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="127.0.0.1", port=8030, reload=True)
\ No newline at end of file
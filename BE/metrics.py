@@ -0,0 +1,124 @@
+import contextvars
+import time
+import uuid
+from contextlib import contextmanager
+from fastapi import Request
+from fastapi.responses import Response
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+STAGE_SECONDS = Histogram(
+    "clinic_bot_stage_seconds",
+    "Time spent in each stage of a turn",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+LLM_TOKENS = Counter(
+    "clinic_bot_llm_tokens_total",
+    "LLM tokens by stage; exact for streamed answers, ~4 chars/token estimates otherwise",
+    ["stage", "kind"]
+)
+CACHE_LOOKUPS = Counter(
+    "clinic_bot_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+)
+PARSE_FAILURES = Counter(
+    "clinic_bot_parse_failures_total",
+    "Classifier responses that could not be parsed into their schema",
+    ["stage"]
+)
+LLM_QUEUE_WAIT = Histogram(
+    "clinic_bot_llm_queue_wait_seconds",
+    "Time LLM calls waited for a backend slot",
+    ["stage"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "clinic_bot_llm_queue_depth",
+    "LLM calls waiting for a backend slot"
+)
+LLM_ACTIVE = Gauge(
+    "clinic_bot_llm_active",
+    "LLM calls holding a backend slot"
+)
+LLM_SHED = Counter(
+    "clinic_bot_llm_shed_total",
+    "LLM calls rejected because they could not start before their deadline",
+    ["stage"]
+)
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+stage_timings_var = contextvars.ContextVar("stage_timings", default=None)
+
+
+def current_request_id():
+    return request_id_var.get()
+
+
+def current_stage_timings():
+    """Stage durations (ms) recorded so far for the current request."""
+    return stage_timings_var.get() or {}
+
+
+def reset_stage_timings():
+    """Start a fresh timing record, for requests that run several turns."""
+    stage_timings_var.set({})
+
+
+@contextmanager
+def observe_stage(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        timings = stage_timings_var.get()
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed * 1000, 2)
+
+
+def record_tokens(stage, prompt_tokens, completion_tokens):
+    LLM_TOKENS.labels(stage=stage, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(stage=stage, kind="completion").inc(completion_tokens)
+
+
+def record_cache(cache, hit, count=1):
+    if count:
+        CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def record_parse_failure(stage):
+    PARSE_FAILURES.labels(stage=stage).inc()
+
+
+def record_llm_queue(depth, active):
+    LLM_QUEUE_DEPTH.set(depth)
+    LLM_ACTIVE.set(active)
+
+
+def record_llm_wait(stage, seconds):
+    LLM_QUEUE_WAIT.labels(stage=stage).observe(seconds)
+
+
+def record_llm_shed(stage):
+    LLM_SHED.labels(stage=stage).inc()
+
+
+def instrument(app):
+    """Add request ID propagation and a Prometheus /metrics endpoint to a FastAPI app."""
+
+    @app.middleware("http")
+    async def request_context(request: Request, call_next):
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        request_id_var.set(request_id)
+        stage_timings_var.set({})
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @app.get("/metrics")
+    def metrics():
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
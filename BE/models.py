@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Literal
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class Intent_Classification(BaseModel):
     class_type: Literal['continue', 'new_task']
@@ -10,6 +10,15 @@ class DomainClassification(BaseModel):
 class QueryClarity(BaseModel):
     class_type: Literal["FAQ", "Booking", "Vague"]
 
+class CombinedClassification(BaseModel):
+    intent: Literal['continue', 'new_task']
+    domain: Literal['dental', 'non-dental']
+    class_type: Literal["FAQ", "Booking", "Vague"]
+
 class QueryInput(BaseModel):
     user_id: str
-    query: str
\ No newline at end of file
+    query: str
+
+class BatchQueryInput(BaseModel):
+    queries: List[QueryInput]
+    max_parallel: Optional[int] = Field(None, gt=0)
@@ -0,0 +1,69 @@
+import json
+import httpx
+from config import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, task_model, task_options
+from http_client import get_http_client
+from metrics import record_tokens
+
+
+def build_payload(prompt, system, model, options, **extra):
+    payload = {"model": model, "prompt": prompt, "options": options, "keep_alive": OLLAMA_KEEP_ALIVE, **extra}
+    if system is not None:
+        # Rendered ahead of the prompt by the model template, so a fixed system
+        # text is a prefix Ollama can reuse from its KV cache
+        payload["system"] = system
+    return payload
+
+
+async def stream_generate(prompt, system=None, model=None, options=None, stage="answer_llm"):
+    """Yield response tokens from Ollama's /api/generate as they are produced.
+
+    Model and options default to the stage's profile in config.TASK_PROFILES.
+    """
+    payload = build_payload(prompt, system, model or task_model(stage), options or task_options(stage), stream=True)
+    client = get_http_client()
+    timeout = httpx.Timeout(10.0, read=None)
+    async with client.stream("POST", f"{OLLAMA_BASE_URL}/api/generate", json=payload, timeout=timeout) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                record_tokens(stage, chunk.get("prompt_eval_count", 0), chunk.get("eval_count", 0))
+                break
+
+
+async def generate_structured(prompt, schema, system=None, model=None, options=None, stage="combined_classify"):
+    """Non-streamed /api/generate constrained to a JSON schema; returns the raw response text."""
+    model, options = model or task_model(stage), options or task_options(stage)
+    payload = build_payload(prompt, system, model, options, stream=False, format=schema)
+    client = get_http_client()
+    response = await client.post(f"{OLLAMA_BASE_URL}/api/generate", json=payload, timeout=httpx.Timeout(10.0, read=60.0))
+    response.raise_for_status()
+    body = response.json()
+    if body.get("error"):
+        raise RuntimeError(body["error"])
+    record_tokens(stage, body.get("prompt_eval_count", 0), body.get("eval_count", 0))
+    return body.get("response", "")
+
+
+async def warm_up_model(model, systems=(), options=None):
+    """Load the model, then prefill each static system prefix so the first real requests can reuse it.
+
+    Pass the options the real calls use: a different num_ctx would make them reload the model.
+    """
+    options = options or {}
+    client = get_http_client()
+    timeout = httpx.Timeout(10.0, read=300.0)
+    # An empty prompt only loads the model
+    load = {"model": model, "keep_alive": OLLAMA_KEEP_ALIVE, "options": options}
+    response = await client.post(f"{OLLAMA_BASE_URL}/api/generate", json=load, timeout=timeout)
+    response.raise_for_status()
+    for system in systems:
+        payload = build_payload(" ", system, model, {**options, "num_predict": 1}, stream=False)
+        response = await client.post(f"{OLLAMA_BASE_URL}/api/generate", json=payload, timeout=timeout)
+        response.raise_for_status()
@@ -0,0 +1,110 @@
+import json
+import threading
+import numpy as np
+from embeddings import encode
+from config import PRE_CLASSIFIER_THRESHOLD, PRE_CLASSIFIER_MIN_SIMILARITY
+
+FAQ_PATH = "../data/FAQ.json"
+BOOKING_PATH = "../data/Booking_Data.json"
+
+# Sharpens the gap between class similarities into a confidence score
+SOFTMAX_TEMPERATURE = 0.05
+
+BOOKING_EXAMPLES = [
+    "I want to book an appointment",
+    "Book a dental cleaning for me",
+    "Can I get an appointment tomorrow morning?",
+    "Are there any slots available this evening?",
+    "Find a dentist near me",
+    "Which clinics have afternoon slots?",
+    "Schedule a check-up for next week",
+    "I need an appointment with an orthodontist",
+    "Is there a slot available tonight?",
+    "Show me clinics with open slots",
+    "Reserve a slot with a dentist",
+    "I'd like to see a dentist as soon as possible",
+]
+
+VAGUE_EXAMPLES = [
+    "hi",
+    "hello",
+    "help",
+    "hey there",
+    "I have a question",
+    "can you help me",
+    "tell me more",
+    "something is wrong",
+    "I need some information",
+    "ok",
+    "not sure",
+    "what about it",
+]
+
+
+def build_examples(faq_path=FAQ_PATH, booking_path=BOOKING_PATH):
+    """Labeled FAQ/Booking/Vague examples built from the data files."""
+    with open(faq_path) as file:
+        faq_data = json.load(file)
+    with open(booking_path) as file:
+        booking_data = json.load(file)
+
+    booking_examples = list(BOOKING_EXAMPLES)
+    for clinic in booking_data:
+        city = clinic["location"]["city"]
+        booking_examples.append(f"Book an appointment in {city}")
+        for specialty in clinic["specialties"]:
+            booking_examples.append(f"Find a {specialty.lower()} clinic in {city}")
+        for slot, available in clinic["slots"].items():
+            if available == "yes":
+                booking_examples.append(f"Any {slot} slots in {city}?")
+
+    return {
+        "FAQ": [item["question"] for item in faq_data],
+        "Booking": booking_examples,
+        "Vague": list(VAGUE_EXAMPLES),
+    }
+
+
+class PreClassifier:
+    """Nearest-neighbour router over labeled example embeddings.
+
+    Each class is scored by its most similar example, which suits the
+    near-verbatim FAQ matches better than a single blurred centroid.
+    """
+
+    def __init__(self, examples):
+        self.labels = sorted(examples)
+        self.vectors = {label: np.asarray(encode(examples[label])) for label in self.labels}
+
+    def classify(self, query):
+        query_vector = np.asarray(encode([query]))[0]
+        scores = np.array([float(np.max(self.vectors[label] @ query_vector)) for label in self.labels])
+        weights = np.exp((scores - scores.max()) / SOFTMAX_TEMPERATURE)
+        probabilities = weights / weights.sum()
+        best = int(np.argmax(scores))
+        return {
+            "class_type": self.labels[best],
+            "confidence": float(probabilities[best]),
+            "similarity": float(scores[best]),
+        }
+
+
+_pre_classifier = None
+_pre_classifier_lock = threading.Lock()
+
+
+def get_pre_classifier():
+    global _pre_classifier
+    if _pre_classifier is None:
+        with _pre_classifier_lock:
+            if _pre_classifier is None:
+                _pre_classifier = PreClassifier(build_examples())
+    return _pre_classifier
+
+
+def pre_classify(query, threshold=PRE_CLASSIFIER_THRESHOLD, min_similarity=PRE_CLASSIFIER_MIN_SIMILARITY):
+    """Return the local classification, or None when the LLM should decide."""
+    result = get_pre_classifier().classify(query)
+    if result["confidence"] < threshold or result["similarity"] < min_similarity:
+        return None
+    return result
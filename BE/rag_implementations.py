@@ -1,110 +1,203 @@
+import startup_profile
+startup_profile.install()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from pymilvus import connections, FieldSchema, CollectionSchema, DataType, Collection, utility
-from sentence_transformers import SentenceTransformer
+from embeddings import get_embedding_model, encode, EmbeddingBatcher
+from retrieval import create_retriever, diff_faq
+from booking_store import BookingStore, compact_clinic
+from metrics import instrument, observe_stage
+from config import (
+    EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS, VECTOR_BACKEND, NUMPY_INDEX_PATH,
+    BATCH_MAX_QUERIES, FAQ_BATCH_CHUNK
+)
+from warmup import Warmup
+from single_flight import SingleFlight, normalize
+import asyncio
+from typing import List, Optional
 import json
 import os
+import uuid
 import uvicorn
 
-app = FastAPI()
-
-# Connect to Milvus
-connections.connect(alias="default", host="localhost", port="19530")
-
-# Initialize embedding model
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-
 # Pydantic model for query input
 class QueryInput(BaseModel):
     query: str
 
-# Define schema
-fields = [
-    FieldSchema(name="_id", dtype=DataType.VARCHAR, max_length=100, is_primary=True, auto_id=False),
-    FieldSchema(name="question", dtype=DataType.VARCHAR, max_length=1024),
-    FieldSchema(name="answer", dtype=DataType.VARCHAR, max_length=2048),
-    FieldSchema(name="created_at", dtype=DataType.VARCHAR, max_length=64),
-    FieldSchema(name="updated_at", dtype=DataType.VARCHAR, max_length=64),
-    FieldSchema(name="embeddings", dtype=DataType.FLOAT_VECTOR, dim=384)
-]
-schema = CollectionSchema(fields, description="FAQ Vector Collection")
+class BatchQueryInput(BaseModel):
+    queries: List[str]
 
 collection_name = "faq_collection"
 
+faq_retriever = create_retriever(VECTOR_BACKEND, collection_name, index_path=NUMPY_INDEX_PATH)
+booking_store = BookingStore("../data/Booking_Data.json")
+embedding_batcher = EmbeddingBatcher(max_batch_size=EMBEDDING_BATCH_SIZE, max_wait_ms=EMBEDDING_BATCH_WAIT_MS)
+
+# Concurrent identical requests share one embed + search / booking lookup
+faq_flight = SingleFlight("coalesce_query_faq")
+booking_flight = SingleFlight("coalesce_booking_search")
+
+# Changes whenever the collection is rebuilt so callers can drop cached answers
+faq_version = uuid.uuid4().hex
+
+
+def load_faq_index():
+    faq_retriever.connect()
+    if not faq_retriever.load():
+        print(f"FAQ index ({VECTOR_BACKEND}) not found. Call /create_faq_db to initialize it.")
+
+
+# Connect, load the collection and the embedding model once instead of per request
+warmup = Warmup("rag", [
+    ("faq_index", load_faq_index),
+    ("embedding_model", get_embedding_model),
+    ("booking_store", lambda: booking_store.refresh(force=True)),
+])
+
+
+def require_faq_index():
+    if not warmup.is_done("faq_index"):
+        raise HTTPException(status_code=503, detail="FAQ index is still loading.", headers={"Retry-After": "1"})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await embedding_batcher.start()
+    warmup.start()
+    yield
+    await embedding_batcher.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+instrument(app)
+warmup.attach(app)
+
 @app.get("/bookings")
 def show_bookings():
     try:
-        with open("../data/Booking_Data.json") as file:
-            data = json.load(file)
-        return {"status":"success", "message": data}
+        return {"status":"success", "message": booking_store.all()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/create_faq_db")
-def create_booking_rag():
-    try:
-        if utility.has_collection(collection_name):
-            utility.drop_collection(collection_name)
-
-        with open("../data/FAQ.json") as file:
-            data = json.load(file)
+def run_booking_search(q, city, specialty, slot, lat, lon, radius_km, limit):
+    # Explicit filters win over the ones picked out of the free-text query
+    filters = booking_store.parse_query(q) if q else {}
+    filters.update({key: value for key, value in {"city": city, "specialty": specialty, "slot": slot}.items() if value})
 
-        collection = Collection(name=collection_name, schema=schema)
-
-        questions = [item["question"] for item in data]
-        embeddings = embedding_model.encode(questions).tolist()
-
-        data_to_insert = [
-            [item["_id"] for item in data],
-            [item["question"] for item in data],
-            [item["answer"] for item in data],
-            [item["created_at"] for item in data],
-            [item["updated_at"] for item in data],
-            embeddings
-        ]
-
-        collection.insert(data_to_insert)
-        collection.create_index(field_name="embeddings", index_params={
-            "index_type": "IVF_FLAT",
-            "metric_type": "IP",
-            "params": {"nlist": 128}
-        })
-        collection.load()
-
-        return {"status": "success", "message": "FAQ vector DB created and loaded successfully."}
+    with observe_stage("booking_search"):
+        clinics, relaxed = booking_store.search(
+            latitude=lat, longitude=lon, radius_km=radius_km, limit=limit, **filters
+        )
+    if relaxed:
+        # Nothing matched them all, so these were ignored; the answer can say so
+        filters["relaxed"] = relaxed
+    return {"status": "success", "filters": filters, "message": [compact_clinic(clinic) for clinic in clinics]}
+
+
+@app.get("/bookings/search")
+async def search_bookings(
+    q: Optional[str] = None,
+    city: Optional[str] = None,
+    specialty: Optional[str] = None,
+    slot: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: float = 25.0,
+    limit: int = 5
+):
+    try:
+        args = (normalize(q) if q else None, city, specialty, slot, lat, lon, radius_km, limit)
+        result, _ = await booking_flight.do(args, asyncio.to_thread, run_booking_search, *args)
+        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/query_faq")
-def query_booking_rag(data: QueryInput):
+@app.post("/create_faq_db")
+def create_booking_rag(full: bool = False):
+    global faq_version
+    require_faq_index()
     try:
-        if not utility.has_collection(collection_name):
-            raise HTTPException(status_code=400, detail="Collection not found. Please initialize it first.")
+        with open("../data/FAQ.json") as file:
+            data = json.load(file)
 
-        collection = Collection(collection_name)
-        collection.load()
+        # Only new or changed entries (by _id and updated_at) are re-embedded
+        fingerprint = {} if full else faq_retriever.fingerprint()
+        changed, deleted = diff_faq(fingerprint, data)
+        if faq_retriever.is_ready() and not changed and not deleted:
+            return {"status": "success", "message": "FAQ vector DB already up to date.", "version": faq_version}
+
+        embeddings = encode([item["question"] for item in changed]) if changed else []
+        new_embeddings = {item["_id"]: vector for item, vector in zip(changed, embeddings)}
+
+        with observe_stage("faq_sync"):
+            faq_retriever.sync(data, new_embeddings)
+        faq_version = uuid.uuid4().hex
+
+        return {
+            "status": "success",
+            "message": "FAQ vector DB created and loaded successfully.",
+            "version": faq_version,
+            "embedded": len(changed),
+            "deleted": len(deleted)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        query_vector = embedding_model.encode([data.query]).tolist()
 
-        results = collection.search(
-            data=query_vector,
-            anns_field="embeddings",
-            param={"metric_type": "IP", "params": {"nprobe": 10}},
-            limit=3,
-            output_fields=["_id", "question", "answer"]
-        )
+async def search_faq(query):
+    # Concurrent requests share one encode call through the batcher
+    with observe_stage("rag_embed"):
+        query_vector = await embedding_batcher.encode(query)
+    with observe_stage("vector_search"):
+        return (await asyncio.to_thread(faq_retriever.search, [query_vector]))[0]
 
-        top_matches = []
-        for hit in results[0]:
-            # top_matches.append({"score": hit.score,"question": hit.entity.question,"answer": hit.entity.answer})
-            top_matches.append(hit.entity.answer)
 
-        return {"matches": top_matches}
+@app.post("/query_faq")
+async def query_booking_rag(data: QueryInput):
+    require_faq_index()
+    if not faq_retriever.is_ready():
+        raise HTTPException(status_code=400, detail="Collection not found. Please initialize it first.")
+    try:
+        top_matches, _ = await faq_flight.do(normalize(data.query), search_faq, data.query)
+        return {"matches": top_matches, "version": faq_version}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query_faq/batch")
+async def query_faq_batch(data: BatchQueryInput):
+    """JSON lines, one {"index", "query", "matches", "version"} per query, in order.
+
+    Each chunk of FAQ_BATCH_CHUNK queries is embedded in one encode call and
+    looked up with one multi-vector search, and its lines are streamed out
+    before the next chunk starts.
+    """
+    require_faq_index()
+    if not faq_retriever.is_ready():
+        raise HTTPException(status_code=400, detail="Collection not found. Please initialize it first.")
+    if len(data.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUERIES} queries per batch.")
+
+    async def lines():
+        for start in range(0, len(data.queries), FAQ_BATCH_CHUNK):
+            chunk = data.queries[start:start + FAQ_BATCH_CHUNK]
+            try:
+                with observe_stage("rag_embed_batch"):
+                    vectors = await asyncio.to_thread(encode, chunk)
+                with observe_stage("vector_search_batch"):
+                    results = await asyncio.to_thread(faq_retriever.search, vectors)
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band and stop
+                yield json.dumps({"index": start, "error": str(e)}) + "\n"
+                return
+            for offset, (query, matches) in enumerate(zip(chunk, results)):
+                yield json.dumps({"index": start + offset, "query": query, "matches": matches, "version": faq_version}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 if __name__=="__main__":
     uvicorn.run("rag_implementations:app", host="127.0.0.1", port=8040, reload=True)
 
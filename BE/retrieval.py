@@ -0,0 +1,275 @@
+import json
+import math
+import os
+import threading
+import time
+import numpy as np
+
+FAQ_FIELDS = ("_id", "question", "answer", "created_at", "updated_at")
+EMBEDDING_DIM = 384
+
+
+def diff_faq(fingerprint, data):
+    """Split FAQ entries into new/changed items and ids that were removed.
+
+    `fingerprint` maps each indexed `_id` to its `updated_at`.
+    """
+    changed = [item for item in data if fingerprint.get(item["_id"]) != item["updated_at"]]
+    current_ids = {item["_id"] for item in data}
+    deleted = [faq_id for faq_id in fingerprint if faq_id not in current_ids]
+    return changed, deleted
+
+
+class BaseRetriever:
+    """Interface shared by the FAQ vector index backends."""
+
+    def connect(self):
+        pass
+
+    def load(self):
+        """Load an existing index; returns False if it hasn't been created."""
+        raise NotImplementedError
+
+    def is_ready(self):
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """Map of indexed `_id` to `updated_at`, empty when nothing is loaded."""
+        raise NotImplementedError
+
+    def sync(self, data, new_embeddings):
+        """Atomically swap in an index holding exactly `data`.
+
+        Rows missing from `new_embeddings` (keyed by `_id`) reuse the vector
+        already stored for them, so only new or changed rows need encoding.
+        """
+        raise NotImplementedError
+
+    def search(self, query_vectors, limit=3):
+        """Return the top answers for each query vector."""
+        raise NotImplementedError
+
+
+def build_faq_schema():
+    from pymilvus import FieldSchema, CollectionSchema, DataType
+
+    fields = [
+        FieldSchema(name="_id", dtype=DataType.VARCHAR, max_length=100, is_primary=True, auto_id=False),
+        FieldSchema(name="question", dtype=DataType.VARCHAR, max_length=1024),
+        FieldSchema(name="answer", dtype=DataType.VARCHAR, max_length=2048),
+        FieldSchema(name="created_at", dtype=DataType.VARCHAR, max_length=64),
+        FieldSchema(name="updated_at", dtype=DataType.VARCHAR, max_length=64),
+        FieldSchema(name="embeddings", dtype=DataType.FLOAT_VECTOR, dim=EMBEDDING_DIM)
+    ]
+    return CollectionSchema(fields, description="FAQ Vector Collection")
+
+
+class MilvusRetriever(BaseRetriever):
+    """Keeps a loaded Milvus collection handle warm across requests.
+
+    Queries go through `collection_name`, an alias over versioned physical
+    collections. A sync builds the next version next to the live one and
+    only then moves the alias, so searches never see a missing index. The
+    replaced version is dropped `retire_delay` seconds later, once searches
+    that already held it have finished.
+    """
+
+    def __init__(self, collection_name, host="localhost", port="19530", retire_delay=5.0):
+        self.collection_name = collection_name
+        self.host = host
+        self.port = port
+        self.retire_delay = retire_delay
+        self.collection = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        from pymilvus import connections
+
+        connections.connect(alias="default", host=self.host, port=self.port)
+
+    def load(self):
+        from pymilvus import Collection, utility
+
+        with self._lock:
+            if not utility.has_collection(self.collection_name):
+                self.collection = None
+                return False
+            collection = Collection(self.collection_name)
+            collection.load()
+            self.collection = collection
+            return True
+
+    def is_ready(self):
+        return self.collection is not None
+
+    def _stored_rows(self, output_fields):
+        rows = {}
+        if self.collection is None:
+            return rows
+        iterator = self.collection.query_iterator(
+            batch_size=1000,
+            expr='_id != ""',
+            output_fields=output_fields
+        )
+        while True:
+            batch = iterator.next()
+            if not batch:
+                iterator.close()
+                return rows
+            for row in batch:
+                rows[row["_id"]] = row
+
+    def fingerprint(self):
+        return {faq_id: row["updated_at"] for faq_id, row in self._stored_rows(["_id", "updated_at"]).items()}
+
+    def sync(self, data, new_embeddings):
+        from pymilvus import Collection, utility
+
+        with self._lock:
+            stored = self._stored_rows(["_id", "embeddings"])
+            embeddings = [
+                new_embeddings[item["_id"]] if item["_id"] in new_embeddings else stored[item["_id"]]["embeddings"]
+                for item in data
+            ]
+
+            next_name = f"{self.collection_name}_v{int(time.time() * 1000)}"
+            collection = Collection(name=next_name, schema=build_faq_schema())
+            collection.insert([
+                [item["_id"] for item in data],
+                [item["question"] for item in data],
+                [item["answer"] for item in data],
+                [item["created_at"] for item in data],
+                [item["updated_at"] for item in data],
+                [list(map(float, vector)) for vector in embeddings]
+            ])
+            # IVF needs fewer lists than rows to be useful on a small corpus
+            nlist = min(128, max(1, int(4 * math.sqrt(len(data)))))
+            collection.create_index(field_name="embeddings", index_params={
+                "index_type": "IVF_FLAT",
+                "metric_type": "IP",
+                "params": {"nlist": nlist}
+            })
+            collection.load()
+
+            previous_name = self.collection.describe()["collection_name"] if self.collection is not None else None
+            # Searches here hold the collection object, not the alias, so switch them first
+            self.collection = collection
+            if previous_name == self.collection_name:
+                # Migrating from a plain collection: it has to go before the alias can take its name.
+                # Other clients of the alias see no collection until create_alias below.
+                time.sleep(self.retire_delay)
+                utility.drop_collection(previous_name)
+                previous_name = None
+
+            if previous_name is not None:
+                utility.alter_alias(next_name, self.collection_name)
+                time.sleep(self.retire_delay)
+                utility.drop_collection(previous_name)
+            else:
+                utility.create_alias(next_name, self.collection_name)
+
+    def search(self, query_vectors, limit=3):
+        results = self.collection.search(
+            data=[list(map(float, vector)) for vector in query_vectors],
+            anns_field="embeddings",
+            param={"metric_type": "IP", "params": {"nprobe": 10}},
+            limit=limit,
+            output_fields=["_id", "question", "answer"]
+        )
+        return [[hit.entity.answer for hit in hits] for hits in results]
+
+
+class NumpyRetriever(BaseRetriever):
+    """Brute-force inner-product search over an in-process embedding matrix.
+
+    With `index_path` set, rebuilds are persisted as `<index_path>.npy`
+    (embeddings, memory-mapped on load) and `<index_path>.json` (rows).
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path
+        self.rows = None
+        self.matrix = None
+        self._lock = threading.Lock()
+        # Held for a whole sync, so concurrent syncs don't share the temp files
+        self._sync_lock = threading.Lock()
+
+    def load(self):
+        if self.index_path is None:
+            return self.is_ready()
+        vectors_path, rows_path = f"{self.index_path}.npy", f"{self.index_path}.json"
+        if not (os.path.exists(vectors_path) and os.path.exists(rows_path)):
+            return False
+        with open(rows_path) as file:
+            rows = json.load(file)
+        matrix = np.load(vectors_path, mmap_mode="r")
+        with self._lock:
+            self.rows, self.matrix = rows, matrix
+        return True
+
+    def is_ready(self):
+        return self.matrix is not None
+
+    def fingerprint(self):
+        with self._lock:
+            rows = self.rows or []
+        return {row["_id"]: row["updated_at"] for row in rows}
+
+    def sync(self, data, new_embeddings):
+        with self._sync_lock:
+            self._sync(data, new_embeddings)
+
+    def _sync(self, data, new_embeddings):
+        with self._lock:
+            rows, matrix = self.rows or [], self.matrix
+        positions = {row["_id"]: i for i, row in enumerate(rows)}
+        vectors = [
+            new_embeddings[item["_id"]] if item["_id"] in new_embeddings else matrix[positions[item["_id"]]]
+            for item in data
+        ]
+
+        rows = [{key: item[key] for key in FAQ_FIELDS} for item in data]
+        if rows:
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(rows), -1)
+        else:
+            # An empty FAQ.json still needs a matrix that search() can take the shape of
+            matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        if self.index_path is not None:
+            self._persist(rows, matrix)
+        # Readers keep whichever (rows, matrix) pair they grabbed, so the swap is atomic for them
+        with self._lock:
+            self.rows, self.matrix = rows, matrix
+
+    def _persist(self, rows, matrix):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_vectors, tmp_rows = f"{self.index_path}.tmp.npy", f"{self.index_path}.tmp.json"
+        np.save(tmp_vectors, matrix)
+        with open(tmp_rows, "w") as file:
+            json.dump(rows, file)
+        os.replace(tmp_vectors, f"{self.index_path}.npy")
+        os.replace(tmp_rows, f"{self.index_path}.json")
+
+    def search(self, query_vectors, limit=3):
+        with self._lock:
+            rows, matrix = self.rows, self.matrix
+        limit = min(limit, len(rows))
+        if limit == 0:
+            return [[] for _ in query_vectors]
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        scores = queries @ matrix.T
+        results = []
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, limit - 1)[:limit]
+            top = top[np.argsort(-query_scores[top])]
+            results.append([rows[i]["answer"] for i in top])
+        return results
+
+
+def create_retriever(backend, collection_name, index_path=None):
+    if backend == "milvus":
+        return MilvusRetriever(collection_name)
+    if backend == "numpy":
+        return NumpyRetriever(index_path)
+    raise ValueError(f"Unknown vector backend: {backend}")
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+def hash_context(context):
+    """Stable hash of the retrieved context an answer was generated from."""
+    payload = json.dumps(context, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Answer cache keyed by query embedding plus a hash of the retrieved context.
+
+    A lookup hits when an entry with the same context hash has a query
+    embedding at least `threshold` similar (cosine, unit vectors) and is
+    younger than `ttl` seconds. The least recently used entry is evicted
+    once `max_size` is reached.
+    """
+
+    def __init__(self, threshold=0.92, ttl=3600, max_size=1024):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, embedding, context_hash):
+        embedding = np.asarray(embedding, dtype=np.float32)
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for key, entry in list(self.entries.items()):
+                if now - entry["created_at"] > self.ttl:
+                    del self.entries[key]
+                    continue
+                if entry["context_hash"] != context_hash:
+                    continue
+                score = float(entry["embedding"] @ embedding)
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(best_key)
+            entry = self.entries[best_key]
+            self.hits += 1
+            self.saved_seconds += entry["llm_seconds"]
+            return entry["response"]
+
+    def store(self, embedding, context_hash, response, llm_seconds=0.0):
+        with self._lock:
+            self.entries[self._next_key] = {
+                "embedding": np.asarray(embedding, dtype=np.float32),
+                "context_hash": context_hash,
+                "response": response,
+                "llm_seconds": llm_seconds,
+                "created_at": time.monotonic(),
+            }
+            self._next_key += 1
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.entries.clear()
+
+    def sync_version(self, version):
+        """Drop every entry when the FAQ collection has been rebuilt."""
+        if version is None or version == self.version:
+            return
+        with self._lock:
+            if self.version is not None:
+                self.entries.clear()
+            self.version = version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "llm_seconds_saved": round(self.saved_seconds, 3),
+                "faq_version": self.version,
+            }
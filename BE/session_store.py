@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class InMemorySessionStore:
+    """Per-user context kept in process, with TTL and a cap on users and entries."""
+
+    def __init__(self, ttl=1800, max_entries=20, max_users=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_users = max_users
+        self.sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            session = self.sessions.get(user_id)
+            if session is None:
+                return []
+            expires_at, entries = session
+            if expires_at < time.monotonic():
+                del self.sessions[user_id]
+                return []
+            self.sessions.move_to_end(user_id)
+            return list(entries)
+
+    def set(self, user_id, entries):
+        with self._lock:
+            self.sessions[user_id] = (time.monotonic() + self.ttl, list(entries)[-self.max_entries:])
+            self.sessions.move_to_end(user_id)
+            while len(self.sessions) > self.max_users:
+                self.sessions.popitem(last=False)
+
+
+class RedisSessionStore:
+    """Per-user context as a capped Redis list that expires `ttl` seconds after the last turn."""
+
+    def __init__(self, redis_url, ttl=1800, max_entries=20, key_prefix="context:"):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.key_prefix = key_prefix
+
+    def ping(self):
+        return self.client.ping()
+
+    def get(self, user_id):
+        raw_entries = self.client.lrange(f"{self.key_prefix}{user_id}", 0, -1)
+        return [json.loads(entry) for entry in raw_entries]
+
+    def set(self, user_id, entries):
+        key = f"{self.key_prefix}{user_id}"
+        entries = list(entries)[-self.max_entries:]
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(key)
+        if entries:
+            pipeline.rpush(key, *[json.dumps(entry, default=str) for entry in entries])
+            pipeline.expire(key, self.ttl)
+        pipeline.execute()
+
+
+def create_session_store(redis_url, ttl, max_turns):
+    """Redis when it is reachable, otherwise the in-process fallback."""
+    # Each turn stores the retrieved context and the answer
+    max_entries = max_turns * 2
+    try:
+        store = RedisSessionStore(redis_url, ttl=ttl, max_entries=max_entries)
+        store.ping()
+        return store
+    except Exception as e:
+        print(f"Redis unavailable ({e}), keeping sessions in memory.")
+        return InMemorySessionStore(ttl=ttl, max_entries=max_entries)
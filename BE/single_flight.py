@@ -0,0 +1,44 @@
+import asyncio
+import re
+from metrics import record_cache
+
+
+def normalize(text):
+    """Case- and whitespace-insensitive form of a query, for coalescing keys."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class SingleFlight:
+    """Shares one in-flight computation between concurrent callers with the same key.
+
+    The first caller for a key starts the coroutine; anyone asking for the same
+    key while it runs awaits that result (or exception) instead of starting
+    their own. The entry is dropped as soon as it finishes, so unlike a cache
+    nothing is ever served after the fact. Coalesced callers are counted as
+    hits of the `name` cache in clinic_bot_cache_lookups_total.
+
+    do() returns (result, coalesced), coalesced being True for every caller
+    but the one whose call did the work.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+
+    async def do(self, key, fn, *args):
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        record_cache(self.name, coalesced)
+        if not coalesced:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # A caller that disconnects must not cancel the work the others are waiting on
+        return await asyncio.shield(task), coalesced
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def in_flight(self):
+        return len(self._inflight)
@@ -0,0 +1,30 @@
+"""Entry points run inside the speech worker processes.
+
+Kept separate from speech_service so workers only import the speech models.
+"""
+import os
+
+
+def warm_up_worker():
+    from STT import get_whisper_model
+    from text_to_speech import get_tts
+
+    get_whisper_model()
+    get_tts()
+
+
+def ping():
+    # Runs after the initializer, so an answer means this worker's models are loaded
+    return os.getpid()
+
+
+def transcribe_job(audio_bytes):
+    from STT import transcribe
+
+    return transcribe(audio_bytes).strip()
+
+
+def synthesize_job(text):
+    from text_to_speech import synthesize
+
+    return synthesize(text)
@@ -0,0 +1,126 @@
+import startup_profile
+startup_profile.install()
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from config import SPEECH_WORKERS, SPEECH_MAX_QUEUE
+from metrics import instrument, observe_stage
+from warmup import Warmup
+import speech_jobs
+import asyncio
+import multiprocessing
+import uvicorn
+
+
+class TTSInput(BaseModel):
+    text: str
+
+
+class SpeechPool:
+    """Process pool with a bounded job queue.
+
+    At most `workers` jobs run at once and `max_queue` more may wait; beyond
+    that new jobs are rejected straight away so callers can back off.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = None
+        self.running = asyncio.Semaphore(workers)
+        self.pending = 0
+
+    def start(self):
+        # spawn keeps torch/ctranslate2 state from being forked into the workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=speech_jobs.warm_up_worker
+        )
+
+    async def warm_up(self, max_rounds=10):
+        # Workers spawn lazily; keep pinging until each one has answered
+        loop = asyncio.get_running_loop()
+        seen = set()
+        for _ in range(max_rounds):
+            seen.update(await asyncio.gather(*(
+                loop.run_in_executor(self.executor, speech_jobs.ping) for _ in range(self.workers)
+            )))
+            if len(seen) >= self.workers:
+                return
+        print(f"Only {len(seen)} of {self.workers} speech workers answered the warm-up")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def submit(self, job, *args):
+        if self.pending >= self.workers + self.max_queue:
+            raise HTTPException(status_code=503, detail="Speech workers are busy, retry shortly.", headers={"Retry-After": "1"})
+        self.pending += 1
+        try:
+            async with self.running:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, job, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {"workers": self.workers, "pending": self.pending, "max_queue": self.max_queue}
+
+
+speech_pool = SpeechPool(SPEECH_WORKERS, SPEECH_MAX_QUEUE)
+warmup = Warmup("speech", [("speech_workers", speech_pool.warm_up)])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    speech_pool.start()
+    warmup.start()
+    yield
+    speech_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+instrument(app)
+warmup.attach(app)
+
+
+@app.post("/stt")
+async def speech_to_text(request: Request):
+    """Transcribe the audio file sent as the raw request body."""
+    audio_bytes = await request.body()
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="No audio received.")
+    try:
+        with observe_stage("stt"):
+            text = await speech_pool.submit(speech_jobs.transcribe_job, audio_bytes)
+        return {"text": text}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/tts")
+async def text_to_speech(data: TTSInput):
+    try:
+        with observe_stage("tts"):
+            audio_bytes = await speech_pool.submit(speech_jobs.synthesize_job, data.text)
+        return Response(content=audio_bytes, media_type="audio/wav")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/speech/stats")
+def speech_stats():
+    return speech_pool.stats()
+
+
+if __name__=="__main__":
+    uvicorn.run("speech_service:app", host="127.0.0.1", port=8050)
@@ -0,0 +1,75 @@
+"""Startup profile mode: import and model-load times per module.
+
+Enabled with STARTUP_PROFILE=1. A service calls install() before its other
+imports; from then on the first import of every module is timed (self time,
+children excluded, summed per top-level package) and warm-up steps record
+their load times through timed(). The report is printed once warm-up
+finishes and included in the /ready response.
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("STARTUP_PROFILE", "0") == "1"
+
+_original_import = builtins.__import__
+_import_seconds = {}
+_load_seconds = {}
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    # Per-thread stack of time spent in nested imports, to get self time
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        package = name.split(".")[0]
+        with _lock:
+            _import_seconds[package] = _import_seconds.get(package, 0.0) + elapsed - children
+
+
+def install():
+    if ENABLED and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+@contextmanager
+def timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _load_seconds[name] = time.perf_counter() - start
+
+
+def report(top=15):
+    with _lock:
+        imports = sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True)[:top]
+        loads = dict(_load_seconds)
+    return {
+        "imports_ms": {package: round(seconds * 1000, 1) for package, seconds in imports},
+        "loads_ms": {name: round(seconds * 1000, 1) for name, seconds in loads.items()},
+    }
+
+
+def print_report(service):
+    profile = report()
+    print(f"Startup profile ({service}):")
+    for section, timings in profile.items():
+        for name, ms in timings.items():
+            print(f"  {section[:-3]:<8}{name:<32}{ms:>10.1f} ms")
@@ -0,0 +1,34 @@
+import json
+import logging
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from `extra={"fields": {...}}`."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_json_logger(name, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+
+    # Prevent duplicate handlers if reloaded
+    if not logger.hasHandlers():
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+        file_handler.setFormatter(JsonLinesFormatter())
+        logger.addHandler(file_handler)
+
+    # Avoid logs being passed to root logger
+    logger.propagate = False
+    return logger
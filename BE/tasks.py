@@ -1,118 +1,147 @@
-from crewai import Task, Crew, Process
-from models import Intent_Classification
-
-def classify_intent(query, agent, llm):
-    prompt_template = f"""
-    You are an intent classification agent. Your job is to analyze a user's natural language query and classify it into one of two task types based on whether it represents a new request or a continuation of a previous task.
-    ---
-
-    ### Classification Rules:
-
-    Use the following strict criteria to determine the correct `class_type`:
-
-    - **'continue'**:
-    - The input refers to or depends on a previous message or result.
-    - Common indicators: "summarize that", "send this", "explain above", "what does that mean", "do it again", "continue"
-    - Typically lacks full task context and relies on conversation memory.
-
-    - **'new_task'**:
-    - The input is self-contained and clearly starts a new request or topic.
-    - Includes its own subject or goal
-
-    Important:
-    - If the intent clearly starts a new actionable or informational task, classify as `'new_task'`.
-    - If the intent is conversational or meta-linguistic (referring to prior interaction), classify as `'continue'`.
-
-    Strictly return with the following Schema :
-    <jsonstart>
-    {{
-        "class_type":"continue" or "new_task",
-    }}
-    <jsonend>
-
-    User Query: "{query}"
-    """
-    task = Task(
-        description=prompt_template,
-        expected_output="A valid JSON matching the Intent_Classification schema",
-        agent=agent,
-        output_json=Intent_Classification
-    )
-    crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=False)
-    return llm.call(prompt_template)
-
-def classify_domain(query, agent, llm):
-    prompt_template = f"""
-    You are a domain classification agent. Your job is to analyze a user's query and classify it as dental or non-dental based on the user query.
-    ---
-    ### Classification Rules:
-
-    Use the following strict criteria to determine the correct `class_type`:
-    - **'dental'**:
-        - Refers to anything involving teeth, gums, dentists, dental hygiene, braces, extractions, cleaning, etc.
-        - Examples: "Book a dental cleaning", "I have a toothache", "I need a dentist appointment"
-
-    - **'non-dental'**:
-        - Anything that is NOT directly related to dentistry.
-        - Could include skin care, eye checkups, general physician questions, etc.
-
-    Important:
-    - Output ONLY the JSON matching the above schema. Do NOT add any commentary or extra text.
-
-    Strictly return with the following Schema :
-    <jsonstart>
-    {{
-        "class_type" : "dental" / "non-dental"
-    }}
-    <jsonend>
-    User Query: "{query}"
-    """
-    task = Task(
-        description=prompt_template,
-        expected_output="A valid JSON matching the schema",
-        agent=agent
-    )
-    crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbosemel=False)
-    return llm.call(prompt_template)
-
-def query_clarity(query, agent, llm):
-    prompt_template = f"""
-    You are a domain classification agent. Your job is to analyze a user's query and classify it as FAQ / Booking / Other based on the user query.
-    ---
-    ### Classification Rules:
-
-    Important:
-    - Output ONLY the JSON matching the above schema. Do NOT add any commentary or extra text.
-
-    Strictly return with the following Schema :
-    <jsonstart>
-    {{
-        "class_type" : "FAQ" / "Booking" / "Vague"
-    }}
-    <jsonend>
-    User Query: "{query}"
-    """
-    task = Task(
-        description=prompt_template,
-        expected_output="A valid JSON matching the schema",
-        agent=agent
-    )
-    crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=False)
-    return llm.call(prompt_template)
+from utils import budget_context, estimate_tokens
+from config import CONTEXT_TOKEN_BUDGET
+from metrics import record_tokens
+
+# Each prompt is a static system prefix plus a short per-request suffix. The
+# prefix is byte-identical on every call, so Ollama can reuse its KV cache and
+# only prefill the suffix; keep anything request-specific out of the *_SYSTEM text.
+
+INTENT_SYSTEM = """You are an intent classification agent. Your job is to analyze a user's natural language query and classify it into one of two task types based on whether it represents a new request or a continuation of a previous task.
+---
+
+### Classification Rules:
+
+Use the following strict criteria to determine the correct `class_type`:
+
+- **'continue'**:
+- The input refers to or depends on a previous message or result.
+- Common indicators: "summarize that", "send this", "explain above", "what does that mean", "do it again", "continue"
+- Typically lacks full task context and relies on conversation memory.
+
+- **'new_task'**:
+- The input is self-contained and clearly starts a new request or topic.
+- Includes its own subject or goal
+
+Important:
+- If the intent clearly starts a new actionable or informational task, classify as `'new_task'`.
+- If the intent is conversational or meta-linguistic (referring to prior interaction), classify as `'continue'`.
+
+Strictly return with the following Schema :
+<jsonstart>
+{
+    "class_type":"continue" or "new_task",
+}
+<jsonend>
+"""
+
+DOMAIN_SYSTEM = """You are a domain classification agent. Your job is to analyze a user's query and classify it as dental or non-dental based on the user query.
+---
+### Classification Rules:
+
+Use the following strict criteria to determine the correct `class_type`:
+- **'dental'**:
+    - Refers to anything involving teeth, gums, dentists, dental hygiene, braces, extractions, cleaning, etc.
+    - Examples: "Book a dental cleaning", "I have a toothache", "I need a dentist appointment"
+
+- **'non-dental'**:
+    - Anything that is NOT directly related to dentistry.
+    - Could include skin care, eye checkups, general physician questions, etc.
+
+Important:
+- Output ONLY the JSON matching the above schema. Do NOT add any commentary or extra text.
+
+Strictly return with the following Schema :
+<jsonstart>
+{
+    "class_type" : "dental" / "non-dental"
+}
+<jsonend>
+"""
+
+CLARITY_SYSTEM = """You are a domain classification agent. Your job is to analyze a user's query and classify it as FAQ / Booking / Other based on the user query.
+---
+### Classification Rules:
+
+Important:
+- Output ONLY the JSON matching the above schema. Do NOT add any commentary or extra text.
+
+Strictly return with the following Schema :
+<jsonstart>
+{
+    "class_type" : "FAQ" / "Booking" / "Vague"
+}
+<jsonend>
+"""
+
+COMBINED_SYSTEM = """You are a query classification agent for a dental clinic assistant. Your job is to analyze a user's query and return its intent, domain and query type together in one response.
+---
+### Classification Rules:
+
+- **intent**:
+    - 'continue': the input refers to or depends on a previous message or result ("summarize that", "what does that mean", "do it again").
+    - 'new_task': the input is self-contained and clearly starts a new request or topic.
+
+- **domain**:
+    - 'dental': anything involving teeth, gums, dentists, dental treatments, or this clinic's services, hours, locations and appointments.
+    - 'non-dental': anything NOT related to dentistry or the clinic (skin care, eye checkups, general physician questions, etc.).
+
+- **class_type**:
+    - 'FAQ': a general question about the clinic, its services, policies, prices or treatments.
+    - 'Booking': a request to find a clinic, check slot availability, or book/reschedule an appointment.
+    - 'Vague': the query is too unclear to answer without more detail.
+
+Important:
+- Output ONLY the JSON matching the schema below. Do NOT add any commentary or extra text.
+
+Strictly return with the following Schema :
+<jsonstart>
+{
+    "intent" : "continue" / "new_task",
+    "domain" : "dental" / "non-dental",
+    "class_type" : "FAQ" / "Booking" / "Vague"
+}
+<jsonend>
+"""
+
+ANSWER_SYSTEM = """You are a helpful and knowledgeable healthcare assistant.
+
+Your task is to read the user's query and use the context to generate a clear, relevant, and concise response around 5-15 words. You must extract the most important information from the context that directly relates to the current query and summarize it appropriately.
+"""
+
+def call_llm(llm, prompt, stage, system=None):
+    messages = [{"role": "user", "content": prompt}]
+    if system is not None:
+        messages.insert(0, {"role": "system", "content": system})
+    response = llm.call(messages)
+    record_tokens(stage, estimate_tokens((system or "") + prompt), estimate_tokens(response))
+    return response
+
+def classifier_prompt(query):
+    return f'User Query: "{query}"'
+
+def classify_intent(query, llm):
+    return call_llm(llm, classifier_prompt(query), "intent_classify", system=INTENT_SYSTEM)
+
+def classify_domain(query, llm):
+    return call_llm(llm, classifier_prompt(query), "domain_classify", system=DOMAIN_SYSTEM)
+
+def query_clarity(query, llm):
+    return call_llm(llm, classifier_prompt(query), "clarity_classify", system=CLARITY_SYSTEM)
+
+def classify_combined(query, llm):
+    return call_llm(llm, classifier_prompt(query), "combined_classify", system=COMBINED_SYSTEM)
+
+def answer_prompt(query, prev_context):
+    summary_input = budget_context(prev_context, CONTEXT_TOKEN_BUDGET)
+    prompt_template = f"""### User Query:
+{query}
+
+### Context:
+{summary_input}
+
+Based on the above, return an appropriate response.
+"""
+    return prompt_template
 
 def answer(query, prev_context, llm):
-    summary_input = [context["result"] for context in prev_context]
-    prompt_template = f"""
-    You are a helpful and knowledgeable healthcare assistant.
-
-    Your task is to read the user's query and use the context to generate a clear, relevant, and concise response around 5-15 words. You must extract the most important information from the context that directly relates to the current query and summarize it appropriately.
-
-    ### User Query:
-    {query}
-
-    ### Context:
-    {summary_input}
-
-    Based on the above, return an appropriate response.
-    """
-    return llm.call(prompt_template)
\ No newline at end of file
+    return call_llm(llm, answer_prompt(query, prev_context), "answer_llm", system=ANSWER_SYSTEM)
@@ -1,15 +1,79 @@
-from TTS.api import TTS
+from scipy.io.wavfile import write
+from collections import OrderedDict
+import io
+import re
+import threading
+import numpy as np
 
-def main_tts(text=""):
-    # Init TTS
-    tts = TTS(model_name="tts_models/en/ljspeech/tacotron2-DDC", progress_bar=False, gpu=False)
+TTS_MODEL_NAME = "tts_models/en/ljspeech/tacotron2-DDC"
+PHRASE_CACHE_SIZE = 256
+SENTENCE_PAUSE_SECONDS = 0.2
+
+_tts = None
+_model_lock = threading.Lock()
+# The Coqui synthesizer is not safe to call from several threads at once
+_synthesis_lock = threading.Lock()
+_phrase_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_tts():
+    """Load the shared TTS model on first use."""
+    global _tts
+    if _tts is None:
+        with _model_lock:
+            if _tts is None:
+                from TTS.api import TTS
+
+                _tts = TTS(model_name=TTS_MODEL_NAME, progress_bar=False, gpu=False)
+    return _tts
+
+
+def split_sentences(text):
+    return [sentence for sentence in re.split(r"(?<=[.!?])\s+", text.strip()) if sentence]
+
+
+def to_wav_bytes(samples):
+    buffer = io.BytesIO()
+    write(buffer, get_tts().synthesizer.output_sample_rate, samples)
+    return buffer.getvalue()
 
-    # Run TTS
-    tmp_file_path = "../data/output.wav"
+
+def synthesize_samples(sentence):
+    """Float32 samples for one sentence, served from the phrase cache when seen before."""
+    with _cache_lock:
+        if sentence in _phrase_cache:
+            _phrase_cache.move_to_end(sentence)
+            return _phrase_cache[sentence]
+
+    tts = get_tts()
+    with _synthesis_lock:
+        samples = np.asarray(tts.tts(text=sentence), dtype=np.float32)
+
+    with _cache_lock:
+        _phrase_cache[sentence] = samples
+        while len(_phrase_cache) > PHRASE_CACHE_SIZE:
+            _phrase_cache.popitem(last=False)
+    return samples
+
+
+def synthesize(text):
+    """The whole response as a single in-memory WAV."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return to_wav_bytes(np.zeros(0, dtype=np.float32))
+    pause = np.zeros(int(get_tts().synthesizer.output_sample_rate * SENTENCE_PAUSE_SECONDS), dtype=np.float32)
+    parts = []
+    for sentence in sentences:
+        parts.extend([synthesize_samples(sentence), pause])
+    return to_wav_bytes(np.concatenate(parts[:-1]))
+
+
+def main_tts(text=""):
     print('Text from TTS : ', text)
-    tts.tts_to_file(text=text, file_path = tmp_file_path)
-    return tmp_file_path
+    return synthesize(text)
 
 
 if __name__=="__main__":
-    _ = main_tts("Hi how are you")
\ No newline at end of file
+    with open("../data/output.wav", "wb") as file:
+        file.write(main_tts("Hi how are you"))
@@ -1,39 +1,185 @@
 import json
 import re
-import requests
-from langchain_redis import RedisChatMessageHistory
-from config import REDIS_URL
+from typing import get_args
+import httpx
+from config import REDIS_URL, RAG_SERVICE_URL
+from http_client import ServiceClient, CircuitBreaker, CircuitOpenError
 
 def add_to_session(session_name, message_type, message):
+    from langchain_redis import RedisChatMessageHistory
+
     full_key = f"{session_name}"
     custom_history = RedisChatMessageHistory(full_key, redis_url=REDIS_URL)
     custom_history.add_message({"type": message_type, "message": message})
 
-def preprocess_text(query_response):
-    match = re.search(r"</?jsonstart>\s*(\{.*?\})\s*</?jsonend/?>", query_response, re.DOTALL)
-    if not match:
-        raise ValueError("No valid JSON found in model response.")
-    return json.loads(match.group(1))
+def extract_json(text):
+    """First JSON object in an LLM response, tolerating wrappers and trailing commas."""
+    text = text.strip()
+    # Schema-constrained output is the bare object, so try that before scanning
+    candidates = [text]
+    match = re.search(r"</?jsonstart>\s*(\{.*?\})\s*</?jsonend/?>", text, re.DOTALL)
+    if match:
+        candidates.append(match.group(1))
+    decoder = json.JSONDecoder()
+    for candidate in candidates:
+        cleaned = re.sub(r",\s*([}\]])", r"\1", candidate)
+        try:
+            value = json.loads(cleaned)
+        except ValueError:
+            continue
+        # A bare "FAQ", list or number is not a classification
+        if isinstance(value, dict):
+            return value
+    # Otherwise decode from each "{" until one parses
+    cleaned = re.sub(r",\s*([}\]])", r"\1", text)
+    for brace in re.finditer(r"\{", cleaned):
+        try:
+            value, _ = decoder.raw_decode(cleaned, brace.start())
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    # A response cut off by the token cap: close it, or failing that keep its complete pairs
+    closed = close_truncated_json(text)
+    if closed is not None:
+        try:
+            value = json.loads(re.sub(r",\s*([}\]])", r"\1", closed))
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            return value
+    pairs = dict(re.findall(r'"(\w+)"\s*:\s*"([^"\\]*)"', text))
+    if pairs:
+        return pairs
+    raise ValueError("No valid JSON found in model response.")
+
+def close_truncated_json(text):
+    """`text` from its first "{" with any open string, array and object closed, or None if nothing is open."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack, in_string, escaped = [], False, False
+    for char in text[start:]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]" and stack:
+            stack.pop()
+            if not stack:
+                return None
+    closed = text[start:].rstrip() + ('"' if in_string else "")
+    # Drop a dangling separator so `{"a": "b",` and `{"a":` can still be closed
+    closed = re.sub(r"[,:]\s*$", "", closed)
+    return closed + "".join("}" if bracket == "{" else "]" for bracket in reversed(stack))
+
+def preprocess_text(query_response, schema=None):
+    """Parse a classifier response, validated against a Pydantic model when given.
+
+    Literal fields are matched case-insensitively, so "faq" is accepted as "FAQ",
+    and a value cut off by the token cap ("Boo") is completed when only one
+    choice starts with it. Raises ValueError (pydantic's ValidationError
+    included) if nothing usable is found.
+    """
+    data = extract_json(query_response)
+    if schema is None:
+        return data
+    for name, field in schema.model_fields.items():
+        choices = get_args(field.annotation)
+        value = data.get(name)
+        if isinstance(value, str) and choices:
+            value = value.strip().lower()
+            exact = [choice for choice in choices if choice.lower() == value]
+            prefixed = [choice for choice in choices if value and choice.lower().startswith(value)]
+            if exact or len(prefixed) == 1:
+                data[name] = (exact or prefixed)[0]
+    return schema.model_validate(data).model_dump()
 
-def query_booking_rag(query):
-    url = "http://localhost:8040/query_faq"
+rag_client = ServiceClient(
+    "rag",
+    RAG_SERVICE_URL,
+    timeouts={"/query_faq": 5.0, "/query_faq/batch": 120.0, "/bookings/search": 3.0, "/bookings": 5.0},
+    breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+)
+
+async def query_faq(query):
     payload = {"query": query}
     try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("matches", [])
-    except requests.exceptions.RequestException as e:
+        response = await rag_client.post("/query_faq", json=payload)
+        return response.json()
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        print(f"API call failed: {e}")
+        return {"matches": [], "version": None}
+
+async def query_faq_batch(queries):
+    """FAQ lookups for many queries in one call, as {query: {"matches", "version"}}."""
+    try:
+        response = await rag_client.post("/query_faq/batch", json={"queries": queries})
+    except (httpx.HTTPError, CircuitOpenError) as e:
         print(f"API call failed: {e}")
-        return []
+        return {}
+    results = {}
+    for line in response.text.splitlines():
+        if not line:
+            continue
+        item = json.loads(line)
+        if "error" in item:
+            print(f"FAQ batch stopped at {item['index']}: {item['error']}")
+            break
+        results[item["query"]] = {"matches": item["matches"], "version": item["version"]}
+    return results
 
-def get_booking_data():
-    url = "http://localhost:8040/bookings"
+async def query_booking_rag(query):
+    return (await query_faq(query)).get("matches", [])
+
+async def get_booking_data(query=None):
+    # With a query, only the clinics matching its city/specialty/slot come back
+    path = "/bookings/search" if query else "/bookings"
+    params = {"q": query} if query else None
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        response = await rag_client.get(path, params=params)
         data = response.json()
         return data.get("message")
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, CircuitOpenError) as e:
         print(f"API call failed: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for prompt budgeting
+    return len(text) // 4 + 1
+
+def budget_context(prev_context, max_tokens):
+    """Newest context results that fit in max_tokens.
+
+    Turns that no longer fit are collapsed into a one-line summary of what
+    the user asked, so long sessions keep a flat prompt size.
+    """
+    kept = []
+    used = 0
+    dropped = []
+    for i in range(len(prev_context) - 1, -1, -1):
+        result = prev_context[i]["result"]
+        cost = estimate_tokens(str(result))
+        if used + cost > max_tokens:
+            if kept:
+                dropped = prev_context[:i + 1]
+            else:
+                # Always keep the newest result, trimmed to the budget
+                kept.append(str(result)[:max_tokens * 4])
+                dropped = prev_context[:i]
+            break
+        kept.append(result)
+        used += cost
+    kept.reverse()
+
+    if dropped:
+        earlier_queries = "; ".join(dict.fromkeys(entry["query"] for entry in dropped))
+        kept.insert(0, f"Earlier in this conversation the user asked about: {earlier_queries}"[:400])
+    return kept
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from fastapi.responses import JSONResponse
+import startup_profile
+
+
+class Warmup:
+    """Preloads a service's models in the background.
+
+    Steps are (name, callable) pairs; sync callables run in a worker thread.
+    They start from the lifespan (or POST /warmup) without holding up startup,
+    and GET /ready answers 503 until every step has succeeded. Failed steps are
+    retried by the next /warmup call.
+    """
+
+    def __init__(self, service, steps):
+        self.service = service
+        self.steps = steps
+        self.state = {name: "pending" for name, _ in steps}
+        self.seconds = {}
+        self.errors = {}
+        self._task = None
+
+    @property
+    def ready(self):
+        return all(state == "done" for state in self.state.values())
+
+    def is_done(self, name):
+        return self.state.get(name) == "done"
+
+    def start(self):
+        if self._task is None or (self._task.done() and not self.ready):
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run_step(self, name, step):
+        self.state[name] = "running"
+        self.errors.pop(name, None)
+        start = time.perf_counter()
+        try:
+            with startup_profile.timed(name):
+                if asyncio.iscoroutinefunction(step):
+                    await step()
+                else:
+                    await asyncio.to_thread(step)
+            self.state[name] = "done"
+        except Exception as e:
+            self.state[name] = "failed"
+            self.errors[name] = str(e)
+            print(f"Warm-up step {name} failed: {e}")
+        self.seconds[name] = round(time.perf_counter() - start, 3)
+
+    async def _run(self):
+        await asyncio.gather(*(
+            self._run_step(name, step) for name, step in self.steps if self.state[name] != "done"
+        ))
+        if startup_profile.ENABLED:
+            startup_profile.print_report(self.service)
+
+    def status(self):
+        status = {"ready": self.ready, "steps": dict(self.state), "seconds": dict(self.seconds)}
+        if self.errors:
+            status["errors"] = dict(self.errors)
+        if startup_profile.ENABLED:
+            status["startup_profile"] = startup_profile.report()
+        return status
+
+    def attach(self, app):
+        """Add POST /warmup and GET /ready to a FastAPI app."""
+
+        @app.post("/warmup", status_code=202)
+        async def warmup():
+            self.start()
+            return self.status()
+
+        @app.get("/ready")
+        async def ready():
+            status = self.status()
+            return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -1,43 +1,200 @@
 import streamlit as st
 import uuid 
-import sounddevice as sd
-from scipy.io.wavfile import write
-import tempfile
+import io
 import os
-from faster_whisper import WhisperModel
-import sys
+import re
+import json
+import queue
+import time
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import sounddevice as sd
+from scipy.io.wavfile import read, write
+
+ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "http://127.0.0.1:8030")
+SPEECH_URL = os.getenv("SPEECH_SERVICE_URL", "http://127.0.0.1:8050")
+# Live audio: a chunk is sent for transcription at the first pause after speech,
+# and listening stops after a longer one. Levels are int16 RMS.
+LIVE_BLOCK_SECONDS = 0.1
+LIVE_SPEECH_RMS = 500
+LIVE_PAUSE_SECONDS = 0.5
+LIVE_END_SECONDS = 1.5
+LIVE_MAX_CHUNK_SECONDS = 10
+# Gap between the first spoken sentence and the rest, as the speech service pauses between sentences
+SENTENCE_PAUSE_SECONDS = 0.2
 
-# Add BE folder to path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'BE')))
-from STT import wave2vecrecording, wave2vecpath
-from text_to_speech import main_tts
 
-# Initialize whisper model once
-model = WhisperModel("base", device="cpu", compute_type="int8")
+@st.cache_resource
+def get_session():
+    """Keep-alive session shared across reruns.
 
+    Only failed connects and 503s (speech service backpressure) are retried,
+    since neither means the request was processed.
+    """
+    session = requests.Session()
+    retry = Retry(total=2, connect=2, read=0, status=2, backoff_factor=0.3, status_forcelist=[503], allowed_methods=None)
+    session.mount("http://", HTTPAdapter(max_retries=retry, pool_maxsize=10))
+    return session
 
-def call_orchestrator(query: str, user_id: str):
-    """Call backend FastAPI orchestrator."""
-    url = "http://127.0.0.1:8030/query"
+
+def stream_orchestrator(query: str, user_id: str, status_placeholder):
+    """Yield answer tokens from the orchestrator's SSE endpoint as they arrive."""
+    url = f"{ORCHESTRATOR_URL}/query/stream"
     payload = {"query": query, "user_id": user_id}
     try:
-        response = requests.post(url, json=payload)
+        # One ID per turn so the orchestrator and RAG logs/metrics can be correlated
+        headers = {"X-Request-ID": uuid.uuid4().hex}
+        with get_session().post(url, json=payload, headers=headers, stream=True, timeout=(5, 120)) as response:
+            response.raise_for_status()
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):])
+                    if event == "status":
+                        status_placeholder.caption(f"⏳ {data['stage'].capitalize()}...")
+                    elif event == "token":
+                        yield data["text"]
+                    elif event == "error":
+                        yield f"API Error: {data['detail']}"
+    except requests.exceptions.RequestException as e:
+        yield f"API Error: {e}"
+    finally:
+        status_placeholder.empty()
+
+
+def record_wav(duration, fs=16000):
+    """Record from the mic into an in-memory WAV file."""
+    audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
+    sd.wait()
+    buffer = io.BytesIO()
+    write(buffer, fs, audio)
+    return buffer.getvalue()
+
+
+def speech_to_text(audio_bytes):
+    """Transcribe audio on the speech service."""
+    try:
+        response = get_session().post(f"{SPEECH_URL}/stt", data=audio_bytes, timeout=(5, 120))
+        response.raise_for_status()
+        return response.json()["text"]
+    except requests.exceptions.RequestException as e:
+        st.error(f"Speech API Error: {e}")
+        return ""
+
+
+def text_to_speech(text):
+    """Synthesize a WAV clip on the speech service."""
+    try:
+        response = get_session().post(f"{SPEECH_URL}/tts", json={"text": text}, timeout=(5, 120))
         response.raise_for_status()
-        return response.json()["response"]
+        return response.content
     except requests.exceptions.RequestException as e:
-        return f"API Error: {e}"
+        st.error(f"Speech API Error: {e}")
+        return None
 
 
 def record_audio(duration=5, fs=16000):
-    """Record from mic and transcribe using faster-whisper."""
+    """Record from mic and transcribe on the speech service."""
     status_placeholder = st.empty()
     status_placeholder.info(f"Recording for {duration} seconds...")
-    text = wave2vecrecording(duration=duration, fs=fs)
+    audio_bytes = record_wav(duration, fs)
+    status_placeholder.info("Transcribing...")
+    text = speech_to_text(audio_bytes)
     status_placeholder.empty()
     return text
 
 
+def to_wav(blocks, fs):
+    buffer = io.BytesIO()
+    write(buffer, fs, np.concatenate(blocks))
+    return buffer.getvalue()
+
+
+def record_live_audio(max_duration=30, fs=16000):
+    """Transcribe speech chunk by chunk, showing the transcript as it forms.
+
+    The mic keeps recording into a queue on its own thread while earlier
+    chunks are transcribed, so nothing said in the meantime is lost. Chunks
+    end at pauses in speech rather than at fixed lengths, and listening
+    stops at the first long silence after speech has started.
+    """
+    transcript_placeholder = st.empty()
+    transcript_placeholder.info("Listening... start speaking.")
+    blocks = queue.Queue()
+    parts, chunk = [], []
+    heard_speech = False
+    silent_seconds = 0.0
+
+    def flush():
+        text = speech_to_text(to_wav(chunk, fs)).strip()
+        chunk.clear()
+        if text:
+            parts.append(text)
+            transcript_placeholder.info(f"🎙️ {' '.join(parts)}")
+
+    def on_audio(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    started = time.monotonic()
+    with sd.InputStream(samplerate=fs, channels=1, dtype='int16', blocksize=int(fs * LIVE_BLOCK_SECONDS), callback=on_audio):
+        while time.monotonic() - started < max_duration:
+            try:
+                block = blocks.get(timeout=1)
+            except queue.Empty:
+                continue
+            speaking = np.sqrt(np.mean(block.astype(np.float32) ** 2)) >= LIVE_SPEECH_RMS
+            if speaking:
+                heard_speech = True
+                silent_seconds = 0.0
+            else:
+                silent_seconds += LIVE_BLOCK_SECONDS
+            if not heard_speech:
+                continue
+
+            chunk.append(block)
+            chunk_seconds = len(chunk) * LIVE_BLOCK_SECONDS
+            if silent_seconds >= LIVE_END_SECONDS:
+                break
+            if (silent_seconds >= LIVE_PAUSE_SECONDS and chunk_seconds > silent_seconds) or chunk_seconds >= LIVE_MAX_CHUNK_SECONDS:
+                flush()
+    if chunk and len(chunk) * LIVE_BLOCK_SECONDS > silent_seconds:
+        flush()
+    transcript_placeholder.empty()
+    return " ".join(parts)
+
+
+def wav_seconds(clip):
+    rate, samples = read(io.BytesIO(clip))
+    return len(samples) / rate
+
+
+def speak(text):
+    """Play `text` aloud, starting as soon as its first sentence is synthesized.
+
+    The first sentence autoplays on its own. The rest is synthesized while it
+    plays and autoplays once it has finished. Returns the clips.
+    """
+    sentences = re.split(r"(?<=[.!?])\s+", text.strip(), maxsplit=1)
+    first = text_to_speech(sentences[0]) if sentences[0] else None
+    if not first:
+        return []
+    st.audio(first, format="audio/wav", autoplay=True)
+    started = time.monotonic()
+    clips = [first]
+    if len(sentences) > 1:
+        rest = text_to_speech(sentences[1])
+        if rest:
+            # Two autoplaying players would talk over each other, so hold the second back
+            time.sleep(max(0.0, wav_seconds(first) + SENTENCE_PAUSE_SECONDS - (time.monotonic() - started)))
+            st.audio(rest, format="audio/wav", autoplay=True)
+            clips.append(rest)
+    return clips
+
+
 def handle_input(mode):
     """Handle user input based on mode (Text, Record, Upload)."""
     user_input = ""
@@ -51,14 +208,14 @@ def handle_input(mode):
         if st.button("🎙️ Record Now"):
             user_input = record_audio(duration)
 
+    elif mode == "Live Audio":
+        if st.button("🎙️ Start Talking"):
+            user_input = record_live_audio()
+
     elif mode == "Upload Audio":
         uploaded = st.file_uploader("Upload audio file", type=["wav", "mp3", "m4a"])
         if uploaded:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=uploaded.name[-4:]) as tmp:
-                tmp.write(uploaded.read())
-                tmp.flush()
-                user_input = wave2vecpath(tmp.name)
-                os.remove(tmp.name)
+            user_input = speech_to_text(uploaded.read())
 
     return user_input
 
@@ -68,8 +225,8 @@ def display_chat():
     for entry in st.session_state.chat_history:
         speaker, msg, audio = entry if len(entry) == 3 else (*entry, None)
         st.markdown(f"**{speaker}:** {msg}")
-        if audio:
-            st.audio(audio, format="audio/wav")
+        for clip in audio or []:
+            st.audio(clip, format="audio/wav")
 
 
 def main():
@@ -91,30 +248,30 @@ def main():
         st.session_state.chat_history = []
 
     # Input mode
-    mode = st.radio("Choose input type:", ["Text", "Record Audio", "Upload Audio"])
+    mode = st.radio("Choose input type:", ["Text", "Record Audio", "Live Audio", "Upload Audio"])
 
     # Get user input
     user_input = handle_input(mode)
 
+    # Display the conversation so far
+    display_chat()
+
     if user_input:
-        # Call orchestrator
-        response = call_orchestrator(user_input, user_id)
+        # Stream the answer from the orchestrator while it is generated
+        st.markdown(f"**You:** {user_input}")
+        st.markdown("**Bot:**")
+        status_placeholder = st.empty()
+        response = st.write_stream(stream_orchestrator(user_input, user_id, status_placeholder))
 
         # Convert response to speech if audio mode
         audio_bytes = None
-        if mode in ["Record Audio", "Upload Audio"]:
-            audio_path = main_tts(response)
-            with open(audio_path, "rb") as f:
-                audio_bytes = f.read()
-            os.remove(audio_path)
+        if mode in ["Record Audio", "Live Audio", "Upload Audio"]:
+            audio_bytes = speak(response) or None
 
         # Update chat history
         st.session_state.chat_history.append(("You", user_input, audio_bytes))
         st.session_state.chat_history.append(("Bot", response, None))
 
-    # Display the conversation
-    display_chat()
-
 
 if __name__ == "__main__":
     main()
@@ -1,58 +1,179 @@
 import streamlit as st
 import os
-from datetime import datetime
+import json
+import threading
 import time
+from collections import Counter, deque
+from datetime import datetime
+import numpy as np
 
 LOG_FILE = "../BE/orchestrator.log"
+BACKFILL_BYTES = 64 * 1024
+WINDOW_SECONDS = 300
+RECENT_TURNS = 10
 
-def read_logs():
-    if not os.path.exists(LOG_FILE):
-        return []
 
-    with open(LOG_FILE, "r") as f:
-        lines = f.readlines()
-    return lines[-10:]
+class LogTailer:
+    """Follows the orchestrator's JSON-lines log from a saved offset.
 
+    Only bytes appended since the last poll are read. A new inode or a file
+    shorter than the offset means the log rotated, so the rest of the
+    rotated file is drained before following the new one from the start.
+    """
 
-def parse_logs(lines):
-    parsed = []
-    for line in lines:
-        try:
-            timestamp, message = line.strip().split("|")
-            parsed.append({
-                "timestamp": timestamp.strip("["),
-                "message": message
-            })
-        except ValueError:
-            continue
-    return parsed
+    def __init__(self, path, history=5000):
+        self.path = path
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.records = deque(maxlen=history)
+        self.skipped = 0
+        self._lock = threading.Lock()
 
+    def _consume(self, data):
+        # Work in bytes so a poll that ends mid-line (or mid-character) is carried over intact
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                self.skipped += 1
+                continue
+            if record.get("message") == "turn":
+                record["epoch"] = datetime.fromisoformat(record["timestamp"]).timestamp()
+                self.records.append(record)
 
-def show_dashboard():
-    st.set_page_config(layout="wide")
-    st.title("🛠️ FastAPI Logs Dashboard")
+    def _read_from(self, path, offset):
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+            return data, file.tell()
+
+    def _backfill(self, size):
+        # First poll: seek back from EOF instead of reading the whole file
+        start = max(0, size - BACKFILL_BYTES)
+        data, self.offset = self._read_from(self.path, start)
+        if start > 0:
+            data = data.split(b"\n", 1)[-1]
+        self._consume(data)
+
+    def _drain_rotated(self, max_backups=10):
+        # Find where our file was rotated to (.1, .2, ...), finish it, then read the newer backups in order
+        backups = [f"{self.path}.{i}" for i in range(1, max_backups + 1)]
+        for position, backup in enumerate(backups):
+            if os.path.exists(backup) and os.stat(backup).st_ino == self.inode:
+                data, _ = self._read_from(backup, self.offset)
+                self._consume(data)
+                for newer in reversed(backups[:position]):
+                    if os.path.exists(newer):
+                        self.partial = b""
+                        data, _ = self._read_from(newer, 0)
+                        self._consume(data)
+                return
+
+    def poll(self):
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            stat = os.stat(self.path)
+
+            if self.inode is None:
+                self.inode = stat.st_ino
+                self._backfill(stat.st_size)
+                return
+
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self._drain_rotated()
+                self.inode, self.offset, self.partial = stat.st_ino, 0, b""
+
+            if stat.st_size > self.offset:
+                data, self.offset = self._read_from(self.path, self.offset)
+                self._consume(data)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.records)
+
+
+@st.cache_resource
+def get_tailer():
+    # Shared by every dashboard session so the log is tailed once per process
+    return LogTailer(LOG_FILE)
+
+
+def aggregate(records, now):
+    window = [record for record in records if now - record["epoch"] <= WINDOW_SECONDS]
+    last_minute = [record for record in window if now - record["epoch"] <= 60]
+    latencies = [record["latency_ms"] for record in window if "latency_ms" in record]
+    return {
+        "qps": len(last_minute) / 60,
+        "turns": len(window),
+        "p50": float(np.percentile(latencies, 50)) if latencies else None,
+        "p95": float(np.percentile(latencies, 95)) if latencies else None,
+        "cache_hit_rate": sum(record.get("cached", False) for record in window) / len(window) if window else None,
+        "classes": Counter(record.get("class_type", "unknown") for record in window),
+        "stages": stage_breakdown(window),
+    }
+
+
+def stage_breakdown(records):
+    stages = {}
+    for record in records:
+        for stage, ms in record.get("stage_timings_ms", {}).items():
+            stages.setdefault(stage, []).append(ms)
+    return [
+        {"stage": stage, "p50 ms": round(float(np.percentile(values, 50)), 1), "p95 ms": round(float(np.percentile(values, 95)), 1)}
+        for stage, values in sorted(stages.items())
+    ]
+
+
+def format_ms(value):
+    return "–" if value is None else f"{value:.0f} ms"
+
+
+def render(refresh_interval):
+    tailer = get_tailer()
+    tailer.poll()
+    records = tailer.snapshot()
+    stats = aggregate(records, time.time())
 
-    refresh_interval = 5  # seconds
     last_updated = datetime.now().strftime("%H:%M:%S")
+    st.markdown(f"⏰ Last updated: `{last_updated}` &nbsp;&nbsp;&nbsp;&nbsp; 🔁 Auto-refresh every {refresh_interval} sec &nbsp;&nbsp;&nbsp;&nbsp; Window: last {WINDOW_SECONDS // 60} min")
 
-    st.markdown(f"⏰ Last updated: `{last_updated}` &nbsp;&nbsp;&nbsp;&nbsp; 🔁 Auto-refresh every {refresh_interval} sec")
+    qps_col, p50_col, p95_col, cache_col = st.columns(4)
+    qps_col.metric("QPS (1 min)", f"{stats['qps']:.2f}")
+    p50_col.metric("Latency p50", format_ms(stats["p50"]))
+    p95_col.metric("Latency p95", format_ms(stats["p95"]))
+    cache_col.metric("Answer cache hits", "–" if stats["cache_hit_rate"] is None else f"{stats['cache_hit_rate']:.0%}")
 
-    logs = parse_logs(read_logs())
+    classes_col, stages_col = st.columns(2)
+    with classes_col:
+        st.subheader("Class distribution")
+        if stats["classes"]:
+            st.bar_chart(dict(stats["classes"]))
+    with stages_col:
+        st.subheader("Stage latency")
+        if stats["stages"]:
+            st.dataframe(stats["stages"], hide_index=True)
 
-    for log in logs:
-        message = log["message"]
-        timestamp = log["timestamp"]
-        if "query" in message.lower():
-            st.markdown(f"<span style='color:green; font-weight:600;'>🟢 Query</span> {timestamp}<br>➤ {message}", unsafe_allow_html=True)
-        elif "response" in message.lower():
-            st.markdown(f"<span style='color:blue; font-weight:600;'>🔵 Response</span> {timestamp}<br>💬 {message}", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<span style='color:gray; font-weight:500;'>🔘 Log</span> {timestamp}<br>{message}", unsafe_allow_html=True)
+    st.subheader("Recent turns")
+    for record in reversed(records[-RECENT_TURNS:]):
+        timestamp = record["timestamp"]
+        st.markdown(f"<span style='color:green; font-weight:600;'>🟢 Query</span> {timestamp} · `{record.get('class_type')}` · {format_ms(record.get('latency_ms'))}<br>➤ {record.get('query')}", unsafe_allow_html=True)
+        st.markdown(f"<span style='color:blue; font-weight:600;'>🔵 Response</span><br>💬 {record.get('response')}", unsafe_allow_html=True)
+
+
+def show_dashboard():
+    st.set_page_config(layout="wide")
+    st.title("🛠️ FastAPI Logs Dashboard")
+
+    refresh_interval = 5  # seconds
 
-    # Auto-refresh workaround using meta-refresh
-    st.markdown(f"""
-        <meta http-equiv="refresh" content="{refresh_interval}">
-    """, unsafe_allow_html=True)
+    # Re-runs only this fragment on a timer, so the tailer's offset survives between refreshes
+    st.fragment(run_every=refresh_interval)(render)(refresh_interval)
 
 if __name__ == "__main__":
-    show_dashboard()
\ No newline at end of file
+    show_dashboard()